@@ -16,7 +16,7 @@ class Tiles:
 
 class Arcade(Computer):
     def __init__(self, height, width, *args, **kwargs):
-        super().__init__(*args, memory=4096, **kwargs)
+        super().__init__(*args, **kwargs)
         self.width = width
         self.height = height
         self.grid = [[" " for _ in range(self.width)] for _ in range(self.height)]
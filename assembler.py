@@ -0,0 +1,461 @@
+import bisect
+import json
+import sys
+
+import errors
+from codes import (
+    ADD,
+    ADJUSTRBASE,
+    BREAK,
+    EQUALS,
+    JUMPIFFALSE,
+    JUMPIFTRUE,
+    LESSTHAN,
+    MULTIPLY,
+    OpCodes,
+)
+from modes import Modes
+
+ARITHMETIC = (ADD.CODE, MULTIPLY.CODE, LESSTHAN.CODE, EQUALS.CODE)
+JUMPS = (JUMPIFTRUE.CODE, JUMPIFFALSE.CODE)
+
+
+class Instruction:
+    """
+    One decoded instruction
+    """
+
+    def __init__(self, address, opcode, modes, parameters):
+        self.address = address
+        self.opcode = opcode
+        self.modes = tuple(modes[: opcode.PARAMETERS])
+        self.parameters = list(parameters)
+
+    def __str__(self):
+        operands = ", ".join(self.operand(i) for i in range(len(self.parameters)))
+        return ("%5d  %-22s %s" % (self.address, self.opcode.NAME, operands)).rstrip()
+
+    @property
+    def size(self):
+        return 1 + self.opcode.PARAMETERS
+
+    @property
+    def following(self):
+        return self.address + self.size
+
+    def operand(self, index):
+        """
+        Symbolic form of a parameter
+        """
+        mode, parameter = self.modes[index], self.parameters[index]
+
+        if mode == Modes.POSITION:
+            return "[%s]" % parameter
+
+        if mode == Modes.IMMEDIATE:
+            return str(parameter)
+
+        return "[rb%+d]" % parameter
+
+    def words(self):
+        """
+        Encode the instruction as Intcode
+        """
+        code = self.opcode.CODE + sum(mode * 10 ** (i + 2) for i, mode in enumerate(self.modes))
+        return [code] + self.parameters
+
+    def condition(self):
+        """
+        Whether a jump with a constant condition is taken, or None
+        """
+        if self.opcode.CODE in JUMPS and self.modes[0] == Modes.IMMEDIATE:
+            return self.opcode.taken(self.parameters[0])
+        return None
+
+    def target(self):
+        """
+        Where a jump with an immediate target goes, or None
+        """
+        if self.opcode.CODE in JUMPS and self.modes[1] == Modes.IMMEDIATE:
+            return self.parameters[1]
+        return None
+
+    def is_noop(self):
+        """
+        Whether running the instruction only moves on to the next one
+        """
+        code, modes, parameters = self.opcode.CODE, self.modes, self.parameters
+
+        if code in JUMPS:
+            return self.condition() is False or self.target() == self.following
+
+        if code == ADJUSTRBASE.CODE:
+            return modes[0] == Modes.IMMEDIATE and parameters[0] == 0
+
+        # x + 0 -> x and x * 1 -> x, unless x is at a negative address, which fails
+        identity = {ADD.CODE: 0, MULTIPLY.CODE: 1}.get(code)
+        return (
+            identity is not None
+            and modes == (Modes.POSITION, Modes.IMMEDIATE, Modes.POSITION)
+            and parameters[1] == identity
+            and parameters[0] == parameters[2]
+            and parameters[0] >= 0
+        )
+
+
+def parse(program):
+    """
+    Turn a comma separated program into a list of ints
+    """
+    if isinstance(program, str):
+        program = [int(n) for n in program.replace("\n", "").split(",")]
+    return list(program)
+
+
+def disassemble(program):
+    """
+    Decode every instruction reachable from address 0
+
+    Returns the instructions by address, and whether that is all of the code -
+    it is not when a jump takes its target from memory.
+    """
+    words = parse(program)
+    opcodes = OpCodes()
+    instructions = {}
+    complete = True
+    pending = [0]
+
+    while pending:
+        address = pending.pop()
+
+        while 0 <= address < len(words) and address not in instructions:
+            try:
+                opcode, modes = opcodes.parse(words[address])
+            except errors.UnknownOpcodeError:
+                break
+
+            parameters = words[address + 1 : address + 1 + opcode.PARAMETERS]
+            if len(parameters) < opcode.PARAMETERS:
+                break
+
+            instruction = instructions[address] = Instruction(address, opcode, modes, parameters)
+
+            if opcode.CODE == BREAK.CODE:
+                break
+
+            if opcode.CODE in JUMPS:
+                target = instruction.target()
+                if target is None:
+                    complete = False
+                elif instruction.condition() is not False:
+                    pending.append(target)
+                if instruction.condition() is True:
+                    break
+
+            address = instruction.following
+
+    return instructions, complete
+
+
+def listing(program):
+    """
+    Disassembly of a program, with the words that are not code shown as DATA
+    """
+    words = parse(program)
+    instructions, _ = disassemble(words)
+    lines = []
+    address = 0
+
+    while address < len(words):
+        if address in instructions:
+            lines.append(str(instructions[address]))
+            address = instructions[address].following
+        else:
+            lines.append("%5d  %-22s %s" % (address, "DATA", words[address]))
+            address += 1
+
+    return "\n".join(lines)
+
+
+def data_addresses(instructions):
+    """
+    Addresses the instructions read or write as data, or None when they use
+    relative mode and so could touch anything
+    """
+    addresses = set()
+
+    for instruction in instructions.values():
+        for mode, parameter in zip(instruction.modes, instruction.parameters):
+            if mode == Modes.RELATIVE:
+                return None
+            if mode == Modes.POSITION:
+                addresses.add(parameter)
+
+    return addresses
+
+
+def fold(instruction):
+    """
+    Fold arithmetic on two immediates into a single constant
+    """
+    if instruction.opcode.CODE in ARITHMETIC and instruction.modes[:2] == (1, 1):
+        value = instruction.opcode.evaluate(*instruction.parameters[:2])
+        instruction.opcode = ADD()
+        instruction.modes = (Modes.IMMEDIATE, Modes.IMMEDIATE, instruction.modes[2])
+        instruction.parameters = [value, 0, instruction.parameters[2]]
+
+
+def code_addresses(instructions):
+    """
+    Every address inside a decoded instruction
+    """
+    return {
+        address
+        for instruction in instructions.values()
+        for address in range(instruction.address, instruction.following)
+    }
+
+
+def jump_targets(words, instructions, complete):
+    """
+    Addresses a jump may land on - the immediate targets, and when some jumps
+    take their target from memory, any instruction address the program holds
+    as data or an immediate value, as that is how return addresses are passed
+    around
+    """
+    targets = {instruction.target() for instruction in instructions.values()} - {None}
+
+    if not complete:
+        code = code_addresses(instructions)
+        values = {word for address, word in enumerate(words) if address not in code} | {
+            parameter
+            for instruction in instructions.values()
+            for mode, parameter in zip(instruction.modes, instruction.parameters)
+            if mode == Modes.IMMEDIATE
+        }
+        targets |= values & set(instructions)
+
+    return targets
+
+
+def written_constant(instruction):
+    """
+    The (position mode, parameter) of the cell an instruction sets to a constant,
+    and the constant, or None
+    """
+    if instruction.opcode.CODE == ADD.CODE and instruction.modes[:2] == (1, 1):
+        value = instruction.parameters[0] + instruction.parameters[1]
+        return (instruction.modes[2] == Modes.POSITION, instruction.parameters[2]), value
+    return None
+
+
+def propagate(writer, consumer):
+    """
+    Make the operands of an instruction that read the constant the instruction
+    before it has just written immediate
+    """
+    written = written_constant(writer)
+    if written is None:
+        return
+
+    cell, value = written
+    # the target of a write is not an operand that can be made immediate
+    readable = consumer.opcode.PARAMETERS - consumer.opcode.WRITES
+
+    for i in range(readable):
+        mode, parameter = consumer.modes[i], consumer.parameters[i]
+        if mode != Modes.IMMEDIATE and (mode == Modes.POSITION, parameter) == cell:
+            consumer.modes = consumer.modes[:i] + (Modes.IMMEDIATE,) + consumer.modes[i + 1 :]
+            consumer.parameters[i] = value
+
+
+def thread(instructions, frozen, address):
+    """
+    Where execution arriving at an address first does something, skipping
+    no-ops and following unconditional jumps
+    """
+    seen = set()
+
+    while address in instructions and address not in frozen and address not in seen:
+        seen.add(address)
+        instruction = instructions[address]
+
+        if instruction.is_noop():
+            address = instruction.following
+        elif instruction.condition() is True and instruction.target() is not None:
+            address = instruction.target()
+        else:
+            break
+
+    return address
+
+
+def optimize(program, written=None):
+    """
+    Peephole optimize a program, returning one with the same outputs that runs
+    fewer instructions
+
+    Constant arithmetic is folded, and a constant written by one instruction is
+    substituted into the next when nothing can jump in between, which folds
+    further arithmetic and settles conditional jumps. Constants written to
+    cells nothing reads are dropped. Jumps are threaded past no-ops and through
+    chains of unconditional jumps, and runs of no-ops are jumped over.
+
+    Instructions that the program reads or writes as data are left alone. For
+    programs that use relative mode, or that jump to addresses held in memory
+    and so have code that cannot be decoded ahead of time, that cannot be
+    worked out statically. They are only optimized when given the set of
+    addresses they write to (as recorded by `profiler.Profiler`), and are then
+    assumed not to read their own code. When every jump target and data address is known, no-ops are
+    removed and the program is relocated.
+    """
+    words = parse(program)
+    instructions, complete = disassemble(words)
+    touched = data_addresses(instructions)
+
+    if (touched is None or not complete) and written is None:
+        return words
+
+    if touched is None:
+        touched = set(written) | {
+            parameter
+            for instruction in instructions.values()
+            for mode, parameter in zip(instruction.modes, instruction.parameters)
+            if mode == Modes.POSITION
+        }
+
+    frozen = {
+        address
+        for address, instruction in instructions.items()
+        if any(a in touched for a in range(address, instruction.following))
+    }
+
+    targets = jump_targets(words, instructions, complete)
+
+    # in address order, so constants carry on down straight-line code
+    for address, instruction in sorted(instructions.items()):
+        if address in frozen:
+            continue
+        fold(instruction)
+        following = instructions.get(instruction.following)
+        if following is not None and following.address not in frozen | targets:
+            propagate(instruction, following)
+
+    if written is None:
+        drop_dead_stores(instructions, frozen)
+
+    for address, instruction in instructions.items():
+        if address not in frozen and instruction.target() is not None:
+            instruction.parameters[1] = thread(instructions, frozen, instruction.target())
+
+    relocating = complete and not frozen and written is None
+    if not relocating:
+        skip_noops(instructions, frozen)
+
+    for address, instruction in instructions.items():
+        words[address : instruction.following] = instruction.words()
+
+    if relocating:
+        words = relocate(words)
+
+    return words
+
+
+def drop_dead_stores(instructions, frozen):
+    """
+    Turn constant writes to cells that no instruction reads into no-ops, for
+    programs whose every data address is a position mode parameter
+    """
+    read = {
+        parameter
+        for instruction in instructions.values()
+        for i, (mode, parameter) in enumerate(zip(instruction.modes, instruction.parameters))
+        if mode == Modes.POSITION and i < instruction.opcode.PARAMETERS - instruction.opcode.WRITES
+    }
+
+    code = code_addresses(instructions)
+
+    for address, instruction in instructions.items():
+        written = written_constant(instruction)
+        if address in frozen or written is None:
+            continue
+        (position, cell), _ = written
+        # a write to a negative address fails, so it is not dead
+        if position and cell >= 0 and cell not in read and cell not in code:
+            # x + 0 -> x, which leaves the cell alone
+            instruction.modes = (Modes.POSITION, Modes.IMMEDIATE, Modes.POSITION)
+            instruction.parameters = [cell, 0, cell]
+
+
+def skip_noops(instructions, frozen):
+    """
+    Replace the first of a run of no-ops with a jump past the rest, for
+    programs that cannot be relocated to remove them
+    """
+    for address, instruction in sorted(instructions.items()):
+        if address in frozen or not instruction.is_noop() or instruction.size < 3:
+            continue
+        target = thread(instructions, frozen, address)
+        if target != instruction.following:
+            # the jump is shorter than the no-op, whose last word is left as it was
+            instructions[address] = Instruction(
+                address, JUMPIFTRUE(), (Modes.IMMEDIATE, Modes.IMMEDIATE), [1, target]
+            )
+
+
+def relocate(words):
+    """
+    Remove the reachable no-ops from a program whose every jump target is
+    immediate and whose data addresses are all position mode parameters
+    """
+    instructions, _ = disassemble(words)
+    removed = [
+        (address, instruction.size)
+        for address, instruction in sorted(instructions.items())
+        if instruction.is_noop() and address != 0
+    ]
+
+    if not removed:
+        return words
+
+    starts = [address for address, _ in removed]
+    # words removed before the start of each removed instruction
+    before = [0]
+    for _, size in removed:
+        before.append(before[-1] + size)
+
+    def moved(address):
+        index = bisect.bisect_right(starts, address)
+        if index and address < starts[index - 1] + removed[index - 1][1]:
+            # inside a removed instruction, so wherever it would have gone on to
+            return starts[index - 1] - before[index - 1]
+        return address - before[index]
+
+    removed_addresses = {a for start, size in removed for a in range(start, start + size)}
+
+    for instruction in instructions.values():
+        for i, mode in enumerate(instruction.modes):
+            if mode == Modes.POSITION or (i == 1 and instruction.target() is not None):
+                instruction.parameters[i] = moved(instruction.parameters[i])
+
+    relocated = []
+    address = 0
+    while address < len(words):
+        if address in removed_addresses:
+            address += 1
+        elif address in instructions:
+            relocated += instructions[address].words()
+            address = instructions[address].following
+        else:
+            relocated.append(words[address])
+            address += 1
+
+    return relocated
+
+
+if __name__ == "__main__":
+
+    with open("inputs.json", "r") as file:
+        program = json.load(file)[sys.argv[1]]
+
+    print(listing(program))
@@ -0,0 +1,92 @@
+import itertools
+import json
+import math
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+
+from computer import Computer
+
+# the machine each worker forks for every run, built from shared memory
+template = None
+
+
+def share(program):
+    """
+    Place a program image in shared memory as int64 words
+    """
+    if isinstance(program, str):
+        program = [int(n) for n in program.replace("\n", "").split(",")]
+
+    words = array("q", program)
+    block = shared_memory.SharedMemory(create=True, size=max(len(words), 1) * 8)
+    block.buf[: len(words) * 8] = words.tobytes()
+    return block, len(words)
+
+
+def attach(name, length, machine):
+    """
+    Worker initializer - build the template machine from the shared image
+    """
+    global template
+
+    block = shared_memory.SharedMemory(name=name)
+    words = block.buf.cast("q")
+    template = machine(words[:length].tolist())
+    words.release()
+    block.close()
+
+
+def run(inputs):
+    """
+    Run one fork of the template machine to completion
+    """
+    machine = template.fork()
+    return machine.run(inputs=list(inputs), early_stopping=True)
+
+
+def run_indexed(task):
+    index, inputs = task
+    return index, run(inputs)
+
+
+def run_batch(program, inputs, machine=Computer, processes=None, ordered=True, chunksize=None):
+    """
+    Run one program over many input vectors on a process pool
+
+    Yields each run's outputs in input order, or (index, outputs) pairs as the
+    runs complete when `ordered` is False.
+    """
+    processes = processes or multiprocessing.cpu_count()
+
+    if chunksize is None:
+        # a few chunks per worker keeps every core busy without per-task overhead
+        chunksize = (
+            max(1, math.ceil(len(inputs) / (4 * processes)))
+            if hasattr(inputs, "__len__")
+            else 16
+        )
+
+    block, length = share(program)
+
+    try:
+        with multiprocessing.Pool(
+            processes, initializer=attach, initargs=(block.name, length, machine)
+        ) as pool:
+            if ordered:
+                yield from pool.imap(run, inputs, chunksize)
+            else:
+                yield from pool.imap_unordered(run_indexed, enumerate(inputs), chunksize)
+    finally:
+        block.close()
+        block.unlink()
+
+
+if __name__ == "__main__":
+
+    with open("inputs.json", "r") as file:
+        program = json.load(file)["tractor"]
+
+    # tractor beam scan: one run per (x, y) probe
+    probes = list(itertools.product(range(50), repeat=2))
+    print(sum(outputs[0] for outputs in run_batch(program, probes)))
@@ -0,0 +1,174 @@
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from channels import encode
+from engines import ENGINES, variant
+from feedback import FeedbackLoop
+from vacuum import Vacuum, functions, main_routine, to_ascii
+
+BASELINES = "benchmarks.json"
+
+
+def load(name):
+    with open(name, "r") as file:
+        return json.load(file)
+
+
+def computer_tests(engine):
+    """
+    Every program in tests.json["computer"]
+    """
+    steps = 0
+    for program, inputs, _ in load("tests.json")["computer"].values():
+        machine = engine(program)
+        machine.run(inputs=inputs)
+        steps += machine.steps
+    return steps
+
+
+def feedback_search(engine):
+    """
+    The feedback loop phase permutation search from test_feedback.py
+    """
+    program = [int(x) for x in load("tests.json")["feedback"].split(",")]
+    steps = 0
+    for order in itertools.permutations(range(5, 10)):
+        loop = FeedbackLoop(size=5, machine=engine, instructions=program, inputs=order)
+        loop.run([0])
+        steps += sum(machine.steps for machine in loop.machines)
+    return steps
+
+
+def sensor_boost(engine):
+    """
+    The BOOST program in sensor boost mode
+    """
+    machine = engine(load("inputs.json")["sensor_boost"])
+    machine.run(inputs=[2])
+    return machine.steps
+
+
+def scaffolding(engine):
+    """
+    The vacuum robot walking the scaffolding
+    """
+    machine = variant(engine, Vacuum)(load("inputs.json")["scaffolding"])
+    machine.inputs.feed(to_ascii(main_routine))
+    for key, value in sorted(functions.items()):
+        machine.inputs.feed(to_ascii(value))
+    machine.inputs.feed(encode("n"))
+    machine.run()
+    return machine.steps
+
+
+def tractor(engine):
+    """
+    A 50x50 tractor beam scan, one run per probe
+    """
+    template = engine(load("inputs.json")["tractor"])
+    steps = 0
+    for x, y in itertools.product(range(50), repeat=2):
+        machine = template.fork()
+        machine.run(inputs=[x, y])
+        steps += machine.steps
+    return steps
+
+
+WORKLOADS = {
+    "computer_tests": computer_tests,
+    "feedback": feedback_search,
+    "sensor_boost": sensor_boost,
+    "scaffolding": scaffolding,
+    "tractor": tractor,
+}
+
+
+def measure(engine, workload, connection):
+    """
+    Run one workload in a fresh process and send back its measurements
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        steps = WORKLOADS[workload](ENGINES[engine])
+        seconds = time.perf_counter() - started
+
+    connection.send(
+        {
+            "seconds": seconds,
+            "instructions": steps,
+            "instructions_per_second": steps / seconds,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+    )
+    connection.close()
+
+
+def benchmark(engine, workload):
+    """
+    Measure a workload on an engine, isolated in its own process for peak RSS
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=measure, args=(engine, workload, sender))
+    process.start()
+    result = receiver.recv()
+    process.join()
+    return result
+
+
+def compare(results, baselines, threshold):
+    """
+    Find workloads that got slower than their baseline by more than the threshold
+    """
+    regressions = []
+
+    for engine, workloads in results.items():
+        for workload, result in workloads.items():
+            baseline = baselines.get(engine, {}).get(workload)
+            if baseline and result["seconds"] > baseline["seconds"] * (1 + threshold):
+                regressions.append(
+                    (engine, workload, result["seconds"] / baseline["seconds"] - 1)
+                )
+
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Intcode VM benchmarks")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS), choices=WORKLOADS)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--save", action="store_true", help="record results as baselines")
+    args = parser.parse_args()
+
+    results = {}
+    for engine in args.engines:
+        for workload in args.workloads:
+            result = results.setdefault(engine, {})[workload] = benchmark(engine, workload)
+            print(
+                f"{engine:>12} {workload:>15} {result['seconds']:9.3f}s "
+                f"{result['instructions_per_second']:12.0f} ins/s "
+                f"{result['peak_rss_kb']:9d} KB"
+            )
+
+    baselines = load(args.baselines) if os.path.exists(args.baselines) else {}
+
+    regressions = compare(results, baselines, args.threshold)
+    for engine, workload, slowdown in regressions:
+        print(f"REGRESSION: {engine} {workload} is {slowdown:.0%} slower than baseline")
+
+    if args.save:
+        for engine, workloads in results.items():
+            baselines.setdefault(engine, {}).update(workloads)
+        with open(args.baselines, "w") as file:
+            json.dump(baselines, file, indent=2)
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,110 @@
+import collections
+import math
+
+import errors
+
+
+class Channel:
+    """
+    FIFO of Intcode values backed by a deque
+
+    Values can be moved in and out one at a time or in bulk with `feed` and
+    `drain`. `channel += values` feeds, so code that grew a list of inputs that
+    way keeps working. A channel with a `capacity` refuses values beyond it.
+    """
+
+    def __init__(self, values=(), capacity=None):
+        self.values = collections.deque()
+        self.capacity = capacity
+        self.feed(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __iadd__(self, values):
+        return self.feed(values)
+
+    def __repr__(self):
+        return "Channel(%s)" % list(self.values)
+
+    @property
+    def room(self):
+        """
+        Number of values that can be added, which is infinite without a capacity
+        """
+        if self.capacity is None:
+            return math.inf
+        return self.capacity - len(self.values)
+
+    def put(self, value):
+        """
+        Add one value
+        """
+        if not self.room:
+            raise errors.ChannelFullError()
+        self.values.append(value)
+
+    def get(self):
+        """
+        Take the oldest value
+        """
+        if not self.values:
+            raise errors.InputStarvedError()
+        return self.values.popleft()
+
+    def feed(self, values):
+        """
+        Add many values at once
+        """
+        if self.capacity is not None:
+            values = list(values)
+            if len(values) > self.room:
+                raise errors.ChannelFullError()
+        self.values.extend(values)
+        return self
+
+    def drain(self):
+        """
+        Take every value, oldest first
+        """
+        values = list(self.values)
+        self.values.clear()
+        return values
+
+
+def encode(*lines):
+    """
+    Encode lines of text as ASCII input values, each ending in a newline
+    """
+    return list("".join(line + "\n" for line in lines).encode("ascii"))
+
+
+def decode(values):
+    """
+    Decode ASCII output values as text
+    """
+    return bytes(values).decode("ascii")
+
+
+def split(values):
+    """
+    Split output into its leading ASCII text and whatever follows, such as the
+    answer a program reports once it has finished drawing
+    """
+    values = list(values)
+    if not values or max(values) < 0x80 and min(values) >= 0:
+        return decode(values), []
+
+    end = next(i for i, value in enumerate(values) if not 0 <= value < 0x80)
+    return decode(values[:end]), values[end:]
+
+
+def frames(values):
+    """
+    Decode ASCII output into frames, which programs separate with blank lines
+    """
+    text = decode(values).strip("\n")
+    return [frame + "\n" for frame in text.split("\n\n")] if text else []
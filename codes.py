@@ -1,4 +1,5 @@
 import errors
+from modes import Modes
 
 
 class OpCode:
@@ -21,7 +22,10 @@ class ADD(OpCode):
 
     def execute(self, computer, inputs, v1, v2, v3):
 
-        computer.program[v3] = int(v1) + int(v2)
+        computer.write(v3, int(v1) + int(v2))
+
+    def evaluate(self, v1, v2):
+        return int(v1) + int(v2)
 
 
 class MULTIPLY(OpCode):
@@ -32,7 +36,10 @@ class MULTIPLY(OpCode):
     WRITES = 1
 
     def execute(self, computer, inputs, v1, v2, v3):
-        computer.program[v3] = int(v1) * int(v2)
+        computer.write(v3, int(v1) * int(v2))
+
+    def evaluate(self, v1, v2):
+        return int(v1) * int(v2)
 
 
 class SAVE(OpCode):
@@ -47,7 +54,7 @@ class SAVE(OpCode):
         """
         Save the value of the inputs[0] to the address in parameters[0]
         """
-        computer.program[v1] = inputs[0]
+        computer.write(v1, inputs[0])
 
 
 class OUTPUT(OpCode):
@@ -80,6 +87,9 @@ class JUMPIFTRUE(OpCode):
         if v1 != 0:
             computer.pointer = int(v2)
 
+    def taken(self, v1):
+        return v1 != 0
+
 
 class JUMPIFFALSE(OpCode):
     """
@@ -97,6 +107,9 @@ class JUMPIFFALSE(OpCode):
         if v1 == 0:
             computer.pointer = int(v2)
 
+    def taken(self, v1):
+        return v1 == 0
+
 
 class LESSTHAN(OpCode):
     """
@@ -112,7 +125,10 @@ class LESSTHAN(OpCode):
     WRITES = 1
 
     def execute(self, computer, inputs, v1, v2, v3):
-        computer.program[v3] = int(v1 < v2)
+        computer.write(v3, int(v1 < v2))
+
+    def evaluate(self, v1, v2):
+        return int(v1 < v2)
 
 
 class EQUALS(OpCode):
@@ -129,7 +145,10 @@ class EQUALS(OpCode):
     WRITES = 1
 
     def execute(self, computer, inputs, v1, v2, v3):
-        computer.program[v3] = int(v1 == v2)
+        computer.write(v3, int(v1 == v2))
+
+    def evaluate(self, v1, v2):
+        return int(v1 == v2)
 
 
 class ADJUSTRBASE(OpCode):
@@ -159,6 +178,69 @@ class BREAK(OpCode):
         computer.finished = True
 
 
+class FUSED(OpCode):
+    """
+    Superinstruction:
+    an instruction that writes a value, followed by a compare or a jump that reads it.
+    The second instruction takes the value straight from the first rather than
+    reading it back from memory, and both run in one dispatch.
+    """
+
+    WRITES = 1
+
+    # pairs that are worth fusing
+    PAIRS = {
+        LESSTHAN.CODE: (JUMPIFTRUE.CODE, JUMPIFFALSE.CODE),
+        EQUALS.CODE: (JUMPIFTRUE.CODE, JUMPIFFALSE.CODE),
+        ADD.CODE: (LESSTHAN.CODE, EQUALS.CODE),
+    }
+
+    def __init__(self, first, second, modes, reuse):
+        self.first = first
+        self.second = second
+        # the modes of the second instruction's parameters
+        self.modes = modes
+        # which of the second instruction's operands read the first one's result
+        self.reuse = reuse
+        self.NAME = f"{first.NAME}+{second.NAME}"
+        self.PARAMETERS = first.PARAMETERS + 1 + second.PARAMETERS
+
+    def execute(self, computer, inputs, v1, v2, v3):
+
+        result = self.first.evaluate(v1, v2)
+        computer.write(v3, result)
+
+        # the pointer is past both instructions
+        start = computer.pointer - self.second.PARAMETERS - 1
+
+        if start <= v3 < computer.pointer:
+            # the write changed the second instruction, so let it be decoded again
+            computer.pointer = start
+            return
+
+        computer.steps += 1
+        parameters = [computer.program[start + i + 1] for i in range(self.second.PARAMETERS)]
+        values = [
+            result
+            if i in self.reuse
+            else parameter
+            if mode == Modes.IMMEDIATE
+            else computer.program[parameter]
+            if mode == Modes.POSITION
+            else computer.program[parameter + computer.relative_base]
+            for i, (mode, parameter) in enumerate(zip(self.modes, parameters))
+        ]
+
+        if self.second.WRITES:
+            target = parameters[2]
+            if self.modes[2]:
+                target += computer.relative_base
+            computer.write(target, self.second.evaluate(*values[:2]))
+
+        elif self.second.taken(values[0]):
+            computer.pointer = int(values[1])
+
+
 class OpCodes:
 
     LOOKUP = {
@@ -183,3 +265,39 @@ class OpCodes:
             raise errors.UnknownOpcodeError(value)
 
         return self.LOOKUP[value]()
+
+    def parse(self, value):
+        """
+        Split an instruction word into an opcode and its parameter modes
+        """
+        if value < 0:
+            raise errors.UnknownOpcodeError(value)
+
+        modes, code = divmod(value, 100)
+        return self.get(code), (modes % 10, modes // 10 % 10, modes // 100 % 10)
+
+    def fuse(self, first, modes, parameters, second, second_modes, second_parameters):
+        """
+        Fuse two decoded instructions into a superinstruction, if they form one of
+        the fusable pairs and the second reads the value the first writes
+        """
+        if second.CODE not in FUSED.PAIRS.get(first.CODE, ()):
+            return None
+
+        if any(mode not in (0, 1, 2) for mode in second_modes[: second.PARAMETERS]):
+            return None
+
+        target, target_mode = parameters[2], modes[2]
+        reuse = tuple(
+            i
+            for i, (mode, parameter) in enumerate(zip(second_modes, second_parameters))
+            if parameter == target
+            and mode != Modes.IMMEDIATE
+            and (mode == Modes.POSITION) == (target_mode == Modes.POSITION)
+            and i < 2
+        )
+
+        if not reuse:
+            return None
+
+        return FUSED(first, second, second_modes, reuse)
@@ -0,0 +1,251 @@
+import collections
+
+import errors
+from codes import (
+    ADD,
+    ADJUSTRBASE,
+    EQUALS,
+    JUMPIFFALSE,
+    JUMPIFTRUE,
+    LESSTHAN,
+    MULTIPLY,
+)
+from computer import Computer
+from modes import Modes
+
+# operators for the instructions that write a value
+EXPRESSIONS = {
+    ADD.CODE: "{} + {}",
+    MULTIPLY.CODE: "{} * {}",
+    LESSTHAN.CODE: "int({} < {})",
+    EQUALS.CODE: "int({} == {})",
+}
+
+# code is interpreted until it has run this many times
+HOT = 2
+
+# code rewritten more often than this is left to the interpreter
+VOLATILE = 2
+
+# number of different blocks kept in SHARED for each start address
+SHARED_VARIANTS = 4
+
+# blocks compiled by any machine, by start address, as (words, block) pairs
+SHARED = collections.defaultdict(list)
+
+MISSING = object()
+
+
+class CompiledComputer(Computer):
+    """
+    Computer that runs straight-line code as compiled Python functions
+
+    The program is split into basic blocks which end at a jump or at an instruction
+    that needs the interpreter (inputs, outputs and BREAK). Each block is compiled
+    into one function with its operand modes resolved ahead of time, so the
+    interpreter only ever sees the instructions that talk to the outside world.
+    That keeps every hook that `Arcade`, `PaintRobot`, `Vacuum` and `RepairDroid`
+    override working unchanged. Code is only compiled once it is hot, and code
+    that keeps being rewritten is interpreted rather than recompiled over and over.
+    """
+
+    CACHES = Computer.CACHES + ("blocks",)
+
+    def __init__(self, *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+
+        # start address -> compiled block (None when the interpreter handles it)
+        self.blocks = {}
+        # address -> number of times a write has landed in compiled code there
+        self.rewrites = collections.Counter()
+        # address -> number of times it has been interpreted
+        self.heat = collections.Counter()
+
+    def parse_opcode_at_pointer(self):
+        """
+        Run compiled blocks until the interpreter is needed, then parse the
+        instruction underneath the pointer
+        """
+        blocks = self.blocks
+        heat = self.heat
+
+        # stop at the instruction budget, so a loop that never leaves compiled
+        # code still hands back control
+        while self.steps < self.limit:
+            block = blocks.get(self.pointer, MISSING)
+            if block is MISSING:
+                heat[self.pointer] += 1
+                if heat[self.pointer] < HOT:
+                    break
+                block = self.compile(self.pointer)
+            if block is None:
+                break
+            self.pointer = block(self)
+
+        return super().parse_opcode_at_pointer()
+
+    def invalidate(self, address):
+        """
+        Drop any decoded instruction or compiled block covering the address
+        """
+        # blocks left to the interpreter stay that way - the decode cache sees
+        # the rewrite, and recompiling them every time would only decline again
+        compiled = [
+            start
+            for start in self.code.get(address, ())
+            if self.blocks.get(start) is not None
+        ]
+        if compiled:
+            self.rewrites[address] += 1
+
+        for start in compiled:
+            del self.blocks[start]
+
+        super().invalidate(address)
+
+    def compile(self, start):
+        """
+        Compile the basic block that starts at an address
+        """
+        for words, block in SHARED[start]:
+            span = range(start, start + len(words))
+            if all(self.program[a] == w for a, w in zip(span, words)) and not any(
+                self.rewrites[a] > VOLATILE for a in span
+            ):
+                return self.register(start, block, start + len(words))
+
+        lines = []
+        pointer = start
+        count = 0
+        # (position mode, parameter) of the cell the previous instruction wrote
+        written = None
+
+        while True:
+            try:
+                opcode, modes = self.decode(pointer)
+            except errors.UnknownOpcodeError:
+                break
+
+            if opcode.INPUTS or opcode.OUTPUTS or not opcode.PARAMETERS:
+                break
+
+            if any(mode not in (0, 1, 2) for mode in modes):
+                break
+
+            following = pointer + opcode.PARAMETERS + 1
+            if any(
+                self.rewrites[address] > VOLATILE
+                for address in range(pointer, following)
+            ):
+                break
+
+            count += 1
+            parameters = [
+                int(self.program[pointer + i + 1]) for i in range(opcode.PARAMETERS)
+            ]
+            values = [
+                # superinstruction: take the value just written instead of reloading it
+                "v"
+                if written == (mode == Modes.POSITION, parameter)
+                and mode != Modes.IMMEDIATE
+                and i < 2
+                else self.operand(mode, parameter)
+                for i, (mode, parameter) in enumerate(zip(modes, parameters))
+            ]
+            written = None
+
+            if opcode.CODE in EXPRESSIONS:
+                target = (
+                    str(parameters[2])
+                    if modes[2] == Modes.POSITION
+                    else f"rb + {parameters[2]}"
+                )
+                written = (modes[2] == Modes.POSITION, parameters[2])
+                lines += [
+                    f"a = {target}",
+                    f"v = {EXPRESSIONS[opcode.CODE].format(*values[:2])}",
+                    "m[a] = v",
+                    "if a in code:",
+                    "    computer.relative_base = rb",
+                    f"    computer.steps += {count}",
+                    "    computer.invalidate(a)",
+                    f"    return {following}",
+                ]
+
+            elif opcode.CODE == ADJUSTRBASE.CODE:
+                lines += [f"rb += {values[0]}"]
+
+            elif opcode.CODE in (JUMPIFTRUE.CODE, JUMPIFFALSE.CODE):
+                condition = "!=" if opcode.CODE == JUMPIFTRUE.CODE else "=="
+                lines += [
+                    "computer.relative_base = rb",
+                    f"computer.steps += {count}",
+                    f"if {values[0]} {condition} 0:",
+                    f"    return int({values[1]})",
+                    f"return {following}",
+                ]
+                pointer = following
+                break
+
+            pointer = following
+
+        if pointer == start:
+            block = None
+        else:
+            if not lines[-1].startswith("return"):
+                lines += [
+                    "computer.relative_base = rb",
+                    f"computer.steps += {count}",
+                    f"return {pointer}",
+                ]
+
+            source = "\n".join(
+                [
+                    "def block(computer):",
+                    "    m = computer.program",
+                    "    code = computer.code",
+                    "    rb = computer.relative_base",
+                ]
+                + ["    " + line for line in lines]
+            )
+            namespace = {}
+            exec(compile(source, f"<block {start}>", "exec"), namespace)
+            block = namespace["block"]
+
+            # other machines running the same code can reuse the block
+            words = tuple(self.program[address] for address in range(start, pointer))
+            SHARED[start] = SHARED[start][-SHARED_VARIANTS + 1 :] + [(words, block)]
+
+        return self.register(start, block, pointer)
+
+    def register(self, start, block, end):
+        """
+        Install a block covering the addresses from start up to end
+        """
+        self.blocks[start] = block
+
+        for address in range(start, max(end, start + 1)):
+            self.code.setdefault(address, set()).add(start)
+
+        return block
+
+    @staticmethod
+    def operand(mode, parameter):
+        """
+        Source for reading a parameter in the given mode
+        """
+        if mode == Modes.POSITION:
+            return f"m[{parameter}]"
+
+        if mode == Modes.IMMEDIATE:
+            return f"({parameter})"
+
+        return f"m[rb + {parameter}]"
+
+
+def compiled(machine):
+    """
+    Build a compiled variant of a Computer subclass
+    """
+    return type(f"Compiled{machine.__name__}", (CompiledComputer, machine), {})
@@ -1,5 +1,10 @@
+import copy
+import math
+
 import errors
-from codes import OpCodes
+from channels import Channel
+from codes import FUSED, OpCodes
+from memory import Memory
 from modes import Modes
 
 
@@ -8,33 +13,99 @@ class Computer:
     Computer
     """
 
-    def __init__(self, program, memory=2048):
+    # attributes that are rebuilt from memory on demand, and so are never saved
+    CACHES = ("decoded", "code")
+
+    def __init__(self, program):
 
         if isinstance(program, str):
             program = [int(n) for n in program.replace("\n", "").split(",")]
 
-        self.memory = memory
-        self.program = program + [0] * (self.memory - len(program))
+        if isinstance(program, Memory):
+            self.program = program.copy()
+        else:
+            self.program = Memory(program)
 
+        self.decoded = {}
+        # address -> start addresses of the decoded instructions covering it
+        self.code = {}
         self.finished = False
-        self.inputs = []
+        self.waiting = False
+        self.inputs = Channel()
+        # set to a Channel to collect outputs beyond what `run` returns
+        self.outputs = None
         self.opcodes = OpCodes()
         self.pointer = 0
         self.relative_base = 0
+        self.steps = 0
+        # instruction count at which `run` hands back control
+        self.limit = math.inf
 
-    def run(self, inputs=[], early_stopping=False):
+    def run(self, inputs=[], early_stopping=False, max_outputs=None, budget=None):
         """
         Run the program
+
+        With early stopping the machine suspends instead of failing when it needs
+        an input that has not arrived, and can be resumed by calling `run` again
+        with more inputs. `max_outputs` suspends it after that many outputs, and
+        `budget` once it has run roughly that many instructions.
         """
         self.inputs += inputs
+        self.waiting = False
+        self.limit = math.inf if budget is None else self.steps + budget
+        outputs = []
 
         while not self.finished:
-            instructions = self.read_next_instruction()
+
+            if self.steps >= self.limit:
+                return outputs
+
+            try:
+                instructions = self.read_next_instruction()
+            except errors.InputStarvedError:
+                if not early_stopping:
+                    raise
+                # the opcode has been parsed but none of its parameters read,
+                # so stepping back one address re-runs it on resume, and it
+                # is counted when it does
+                self.pointer -= 1
+                self.steps -= 1
+                self.waiting = True
+                return outputs
+
             output = self.execute(**instructions)
             if output is not None:
+                outputs.append(output)
                 self.process_outputs(output)
+                if len(outputs) == max_outputs:
+                    return outputs
 
-        return self.post_process()
+        result = self.post_process()
+        return outputs if result is None else result
+
+    def fork(self):
+        """
+        Copy the machine, sharing its memory pages copy-on-write
+        """
+        memo = {
+            id(self.program): self.program.copy(),
+            id(self.decoded): dict(self.decoded),
+            id(self.code): {address: set(starts) for address, starts in self.code.items()},
+            id(self.opcodes): self.opcodes,
+        }
+        return copy.deepcopy(self, memo)
+
+    def snapshot(self):
+        """
+        Capture the state of the machine, to go back to with `restore`
+        """
+        return self.fork()
+
+    def restore(self, snapshot):
+        """
+        Go back to the state captured in a snapshot
+        """
+        self.__dict__.update(snapshot.fork().__dict__)
 
     def post_process(self):
         """
@@ -44,9 +115,11 @@ class Computer:
 
     def process_outputs(self, output):
         """
-        Process outputs
+        Process outputs - they are buffered for `outputs.drain()` when an
+        outputs channel has been attached, and are otherwise only returned
         """
-        print(" >> %s" % output)
+        if self.outputs is not None:
+            self.outputs.put(output)
 
     def read_next_instruction(self):
         """
@@ -74,7 +147,7 @@ class Computer:
         """
         Get the inputs
         """
-        return [self.inputs.pop(0)]
+        return [self.inputs.get()]
 
     def execute(self, opcode, parameters, modes, inputs):
         """
@@ -100,10 +173,11 @@ class Computer:
                 raise errors.UnknownModeError(mode)
 
         if opcode.WRITES:
-            values[-1] = (
-                parameters[-1]
-                if not modes[len(values) - 1]
-                else self.relative_base + parameters[-1]
+            index = len(values) - 1
+            values[index] = (
+                parameters[index]
+                if not modes[index]
+                else self.relative_base + parameters[index]
             )
 
         return opcode.execute(self, inputs, *values)
@@ -113,12 +187,64 @@ class Computer:
         Parse an instruction underneath the pointer into an opcode and parameters
         and then advance the pointer
         """
-        bits = [*str(self.program[self.pointer])]
+        entry = self.decoded.get(self.pointer)
+
+        if entry is None:
+            opcode, modes = self.fuse(self.pointer, *self.decode(self.pointer))
+            entry = self.decoded[self.pointer] = (opcode, modes, opcode.PARAMETERS)
+
+            for address in range(self.pointer, self.pointer + opcode.PARAMETERS + 1):
+                self.code.setdefault(address, set()).add(self.pointer)
+
         self.pointer += 1
+        self.steps += 1
+
+        return entry[0], entry[1]
+
+    def decode(self, address):
+        """
+        Decode the instruction at an address, bypassing the cache
+        """
+        return self.opcodes.parse(self.program[address])
+
+    def fuse(self, address, opcode, modes):
+        """
+        Fuse the instruction at an address with the next one where they form a
+        superinstruction
+        """
+        if opcode.CODE not in FUSED.PAIRS:
+            return opcode, modes
 
-        bits = [0] * (5 - len(bits)) + bits
+        following = address + opcode.PARAMETERS + 1
 
-        opcode = int("".join(map(str, bits[-2:])))
-        modes = [int(e) for e in bits][2::-1]
+        try:
+            second, second_modes = self.decode(following)
+        except errors.UnknownOpcodeError:
+            return opcode, modes
 
-        return self.opcodes.get(opcode), modes
+        fused = self.opcodes.fuse(
+            opcode,
+            modes,
+            [self.program[address + i + 1] for i in range(opcode.PARAMETERS)],
+            second,
+            second_modes,
+            [self.program[following + i + 1] for i in range(second.PARAMETERS)],
+        )
+
+        return (fused, modes) if fused else (opcode, modes)
+
+    def write(self, address, value):
+        """
+        Write a value to memory
+        """
+        self.program[address] = value
+
+        if address in self.code:
+            self.invalidate(address)
+
+    def invalidate(self, address):
+        """
+        Drop any decoded instruction whose span covers the address
+        """
+        for start in self.code.pop(address, ()):
+            self.decoded.pop(start, None)
@@ -0,0 +1,220 @@
+import json
+import random
+import sys
+
+from channels import encode
+from codes import OpCodes
+from engines import ENGINES, Interpreter
+from lockstep import Lockstep
+from modes import Modes
+from vacuum import functions, main_routine, to_ascii
+
+# instructions the reference may run before a case is set aside as non-halting
+BUDGET = 20_000
+
+# runs longer than this are not repeated on the (slow per instruction) lockstep engine
+LOCKSTEP_STEPS = 2_000
+
+# inputs for the programs in inputs.json
+INPUTS = {
+    "sensor_boost": [[1], [2]],
+    "tractor": [[0, 0], [3, 4], [20, 30]],
+    "scaffolding": [
+        to_ascii(main_routine)
+        + [value for key in sorted(functions) for value in to_ascii(functions[key])]
+        + encode("n")
+    ],
+}
+
+
+def outcome(machine, inputs, budget):
+    """
+    Run a machine and capture everything that must match between engines
+    """
+    try:
+        outputs = machine.run(inputs=list(inputs), early_stopping=True, budget=budget)
+        error = None
+    except Exception as exception:
+        outputs = None
+        error = type(exception).__name__
+
+    memory = machine.program
+    return {
+        "outputs": outputs,
+        "error": error,
+        "memory": {
+            index * len(page) + offset: value
+            for index, page in memory.pages.items()
+            for offset, value in enumerate(page)
+            if value
+        },
+        "pointer": machine.pointer,
+        "relative_base": machine.relative_base,
+        "finished": machine.finished,
+    }
+
+
+def lockstep_outcome(program, inputs):
+    """
+    The same as `outcome`, for a batch of one on the lockstep engine
+    """
+    machine = Lockstep(program, [list(inputs)])
+    try:
+        outputs = machine.run()[0]
+        error = None
+    except (OverflowError, MemoryError):
+        # values beyond 64 bits and huge addresses are out of scope for lockstep
+        return None
+    except Exception as exception:
+        outputs = None
+        error = type(exception).__name__
+
+    row = machine.memory[0]
+    return {
+        "outputs": outputs,
+        "error": error,
+        "memory": {int(a): int(row[a]) for a in row.nonzero()[0]},
+        "pointer": int(machine.pointer[0]),
+        "relative_base": int(machine.relative_base[0]),
+        "finished": bool(machine.finished[0]),
+    }
+
+
+def check(program, inputs, engines=ENGINES, lockstep=True):
+    """
+    Compare every engine with the reference interpreter on one run
+
+    Returns a list of (engine, field, expected, got) differences, or None when
+    the reference does not halt or wait for input within BUDGET instructions.
+    Fields other than the error are not compared after a run that failed, as
+    engines may fail at different points within an instruction.
+    """
+    reference = Interpreter(program)
+    expected = outcome(reference, inputs, BUDGET)
+
+    if expected["error"] is None and not expected["finished"] and not reference.waiting:
+        return None
+
+    results = {
+        name: outcome(engine(program), inputs, 10 * BUDGET)
+        for name, engine in engines.items()
+        if engine is not Interpreter
+    }
+
+    if lockstep and reference.steps <= LOCKSTEP_STEPS:
+        result = lockstep_outcome(program, inputs)
+        if result is not None:
+            results["lockstep"] = result
+
+    fields = ["error"] if expected["error"] else list(expected)
+
+    return [
+        (name, field, expected[field], result[field])
+        for name, result in results.items()
+        for field in fields
+        if result[field] != expected[field]
+    ]
+
+
+def random_program(rng, instructions=24, data=16):
+    """
+    A random valid program using every opcode and mode
+
+    Data addresses are mostly in a block after the code, reached directly or
+    through a relative base pointing at it, with the odd write into the code
+    itself. Jumps go to the start of any instruction, so some programs loop
+    forever and are set aside by `check`.
+    """
+    opcodes = list(OpCodes.LOOKUP.values())
+    shapes = [rng.choice(opcodes) for _ in range(instructions - 2)]
+    starts = [0, 2]
+    for opcode in shapes:
+        starts.append(starts[-1] + opcode.PARAMETERS + 1)
+
+    code = starts[-1] + 1
+    words = [109, code + data // 2]
+
+    def value():
+        return rng.choice([0, 1, -1, rng.randint(-9, 9), rng.randint(-1000, 1000), 2 ** 40])
+
+    for opcode in shapes:
+        modes = []
+        parameters = []
+
+        for index in range(opcode.PARAMETERS):
+            writes = opcode.WRITES and index == opcode.PARAMETERS - 1
+            mode = rng.choice([Modes.POSITION, Modes.RELATIVE] if writes else [0, 1, 2])
+            jump_target = opcode.CODE in (5, 6) and index == 1
+
+            if mode == Modes.IMMEDIATE:
+                parameter = rng.choice(starts) if jump_target else value()
+            elif mode == Modes.POSITION:
+                parameter = rng.randrange(code + data) if rng.random() < 0.1 else code + rng.randrange(data)
+            else:
+                parameter = rng.randrange(-data // 2, data // 2)
+
+            modes.append(mode)
+            parameters.append(parameter)
+
+        words.append(opcode.CODE + sum(mode * 10 ** (i + 2) for i, mode in enumerate(modes)))
+        words += parameters
+
+    words.append(99)
+    # the data block holds a mix of values and instruction addresses to jump to
+    words += [rng.choice(starts) if rng.random() < 0.5 else value() for _ in range(data)]
+    return words
+
+
+def cases(seed=0, count=500):
+    """
+    Every (source, program, inputs) case: tests.json, inputs.json, and random
+    programs
+    """
+    with open("tests.json", "r") as file:
+        tests = json.load(file)
+
+    for name, [program, inputs, _] in tests["computer"].items():
+        yield "tests.json %s" % name, program, inputs
+
+    with open("inputs.json", "r") as file:
+        programs = json.load(file)
+
+    for name, program in programs.items():
+        for inputs in INPUTS.get(name, [[]]):
+            yield "inputs.json %s %s" % (name, inputs[:4]), program, inputs
+
+    rng = random.Random(seed)
+    for index in range(count):
+        inputs = [rng.randint(-5, 5) for _ in range(rng.randrange(8))]
+        yield "random %s/%s" % (seed, index), random_program(rng), inputs
+
+
+def run(seed=0, count=500, engines=ENGINES, lockstep=True):
+    """
+    Check every case, returning the differences and the number of cases skipped
+    as non-halting
+    """
+    differences = []
+    skipped = 0
+
+    for source, program, inputs in cases(seed, count):
+        result = check(program, inputs, engines, lockstep)
+        if result is None:
+            skipped += 1
+        differences += [(source,) + difference for difference in result or []]
+
+    return differences, skipped
+
+
+if __name__ == "__main__":
+
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    differences, skipped = run(seed, count)
+
+    for source, engine, field, expected, got in differences:
+        print("%s: %s %s expected %r, got %r" % (source, engine, field, expected, got))
+
+    print("%s differences, %s non-halting cases skipped" % (len(differences), skipped))
+    sys.exit(1 if differences else 0)
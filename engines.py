@@ -0,0 +1,35 @@
+from compiler import CompiledComputer
+from computer import Computer
+
+
+class Interpreter(Computer):
+    """
+    Computer without the decode cache - decodes every instruction it runs
+    """
+
+    def parse_opcode_at_pointer(self):
+        """
+        Parse an instruction underneath the pointer into an opcode and parameters
+        and then advance the pointer
+        """
+        opcode, modes = self.decode(self.pointer)
+        self.pointer += 1
+        self.steps += 1
+        return opcode, modes
+
+
+ENGINES = {
+    "interpreter": Interpreter,
+    "decoded": Computer,
+    "compiled": CompiledComputer,
+}
+
+
+def variant(engine, machine=Computer):
+    """
+    Build a Computer subclass that runs on the given engine
+    """
+    if issubclass(machine, engine):
+        return machine
+
+    return type(f"{engine.__name__}{machine.__name__}", (engine, machine), {})
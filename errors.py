@@ -4,3 +4,31 @@ class UnknownModeError(Exception):
 
 class UnknownOpcodeError(Exception):
     pass
+
+
+class InputStarvedError(Exception):
+    pass
+
+
+class ImageError(Exception):
+    pass
+
+
+class TraceError(Exception):
+    pass
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ImpureMachineError(Exception):
+    pass
+
+
+class ChannelFullError(Exception):
+    pass
+
+
+class DeadlockError(Exception):
+    pass
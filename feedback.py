@@ -3,38 +3,93 @@ import json
 
 import requests
 
+from channels import Channel
 from computer import Computer
+from scheduler import Scheduler
+
+
+# values a machine's input channel holds before the machines feeding it wait
+CAPACITY = 64
 
 
 class FeedbackLoop:
     """
     Feedback Loop of Machines
+
+    By default the machines form a ring, each feeding the next. `edges` maps a
+    machine's index to the indices of the machines its outputs go to, for any
+    other graph - an output sent to several machines goes to each of them, and
+    a machine fed by several takes their outputs in the order they arrive.
+    Every machine reads through a channel holding at most `capacity` values.
     """
 
-    def __init__(self, size, machine, instructions, inputs):
-        self.machines = [machine([x for x in instructions.copy()]) for _ in range(size)]
+    def __init__(self, size, machine, instructions, inputs, edges=None, capacity=CAPACITY):
+        self.template = machine(instructions)
+        self.size = size
         self.inputs = inputs
-
-    def run(self, initial_input):
+        if edges is None:
+            edges = {idx: [(idx + 1) % size] for idx in range(size)}
+        self.edges = edges
+        self.capacity = capacity
+        self.machines = []
+        self.scheduler = None
+        self.signal = None
+
+    def run(self, initial_input, output=None):
         """
-        Run the machines
+        Run the machines, starting with an input to the first, and return the
+        last output of the `output` machine (by default the last one)
+
+        Every run starts from fresh machines, so a loop can be run again.
         """
-        idx = 0
-        outputs = initial_input
-        stack = []
+        output = self.size - 1 if output is None else output
+        self.machines = [self.template.fork() for _ in range(self.size)]
+        for machine in self.machines:
+            machine.inputs = Channel(capacity=self.capacity)
+        self.scheduler = Scheduler()
+        self.signal = None
+
+        def record(outputs):
+            self.signal = outputs[-1]
+
+        for idx, machine in enumerate(self.machines):
+            inputs = [self.inputs[idx]] + (list(initial_input) if idx == 0 else [])
+            self.scheduler.add(
+                idx,
+                machine,
+                inputs,
+                on_output=record if idx == output else None,
+                feeds=self.edges.get(idx, ()),
+            )
+
+        self.scheduler.run()
 
-        while not all(machine.finished for machine in self.machines):
+        return self.signal
 
-            if outputs:
-                stack += outputs
 
-            machine = self.machines[idx % 5]
-            inputs = [self.inputs[idx % 5]] if idx < 5 else []
+def search(program, phases=range(5, 10), stages=None, prefix=(), machine=Computer):
+    """
+    Find the order of phase settings giving the largest signal out of a
+    feedback loop, trying only the orders that start with `prefix`
+
+    Returns the largest signal and the order giving it.
+    """
+    if isinstance(program, str):
+        program = [int(x) for x in program.replace("\n", "").split(",")]
+
+    phases = list(phases)
+    stages = len(phases) if stages is None else stages
+    rest = [phase for phase in phases if phase not in prefix]
+    best, best_order = None, None
 
-            outputs = machine.run(inputs=inputs + outputs, early_stopping=True)
-            idx += 1
+    for tail in itertools.permutations(rest, stages - len(prefix)):
+        order = tuple(prefix) + tail
+        loop = FeedbackLoop(size=stages, machine=machine, instructions=program, inputs=order)
+        output = loop.run([0])
+        if best is None or output > best:
+            best, best_order = output, order
 
-        return stack[-1]
+    return best, best_order
 
 
 def get_program():
@@ -49,15 +104,6 @@ def get_program():
 if __name__ == "__main__":
 
     program = get_program()
-    program = [int(x) for x in program.replace("\n", "").split(",")]
-    largest = 0
-
-    for order in itertools.permutations(range(5, 10)):
-
-        loop = FeedbackLoop(
-            size=5, machine=Computer, instructions=program, inputs=order
-        )
-        output = loop.run([0])
-        largest = max(output, largest)
+    largest, order = search(program)
 
-    print(f'found: {largest}')
+    print(f'found: {largest} from {order}')
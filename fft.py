@@ -3,79 +3,171 @@ import math
 import numpy
 
 
-def pt1(digits):
+def digits_of(text):
+    """
+    Array of the digits in a string
+    """
+    return numpy.frombuffer(text.strip().encode("ascii"), dtype=numpy.uint8) - ord("0")
 
-    signal = [int(x) for x in digits]
-    signal_length = len(signal)
-    base_pattern = [0, 1, 0, -1]
 
-    def extend(x):
-        return (x * math.ceil((signal_length + 1) / len(x)))[1 : signal_length + 1]
+def phase(signal):
+    """
+    Apply one phase to a signal, in O(n log n) time and O(n) memory
+
+    Output digit k (counting from 1) adds the runs of k input digits starting at
+    k - 1, 5k - 1, 9k - 1, ... and subtracts the runs starting at 3k - 1,
+    7k - 1, ..., each of which is the difference of two prefix sums. There are
+    about n / k runs for digit k, so n log n in all. Small k are done one digit
+    at a time over all of its runs, and large k one run at a time over all of
+    the digits that have it, so neither loop runs more than about sqrt(n) times.
+    """
+    n = len(signal)
+    prefix = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(signal, dtype=numpy.int64, out=prefix[1:])
+    totals = numpy.zeros(n, dtype=numpy.int64)
+    split = math.isqrt(n) + 1
+
+    for k in range(1, min(split, n + 1)):
+        starts = numpy.arange(k - 1, n, 2 * k)
+        runs = prefix[numpy.minimum(starts + k, n)] - prefix[starts]
+        totals[k - 1] = runs[0::2].sum() - runs[1::2].sum()
+
+    # every k from split up, with run j starting at (2j + 1)k - 1
+    ks = numpy.arange(split, n + 1)
+    j = 0
+    # run j exists for every k with (2j + 1)k <= n
+    while (count := n // (2 * j + 1) - split + 1) > 0:
+        starts = (2 * j + 1) * ks[:count] - 1
+        runs = prefix[numpy.minimum(starts + ks[:count], n)] - prefix[starts]
+        totals[split - 1 : split - 1 + count] += -runs if j % 2 else runs
+        j += 1
+
+    return (numpy.abs(totals) % 10).astype(numpy.uint8)
+
+
+def pt1(digits, phases=100):
+    """
+    80871224563215145230759596 becomes 24176176 - the first eight digits after
+    100 phases
+    """
+    signal = digits_of(digits)
+    for _ in range(phases):
+        signal = phase(signal)
 
-    def mutate(signal):
-        values = numpy.array([signal for _ in range(signal_length)])
-        result = numpy.abs(numpy.multiply(grid, values).sum(axis=1)) % 10
-        return list(result)
+    return "".join(map(str, signal[:8]))
+
+
+# digits summed at a time in `tail_phase`, small enough that the sums fit a uint32
+CHUNK = 1 << 16
+
+
+def tail(signal, repeats=10_000):
+    """
+    The digits of the repeated signal from the message offset on, one byte each
+
+    Raises ValueError unless the offset is in the second half of the signal,
+    where every pattern past it is all ones.
+    """
+    digits = digits_of(signal)
+    offset = int(signal[:7])
+    length = len(digits) * repeats
+
+    if not length // 2 <= offset < length:
+        raise ValueError("offset %s is not in the second half of the signal" % offset)
+
+    # resize repeats the digits, starting here from where the offset falls
+    return numpy.resize(numpy.roll(digits, -(offset % len(digits))), length - offset)
 
-    grid = numpy.array(
-        [
-            extend(sum([[element] * i for element in base_pattern], []))
-            for i in range(1, signal_length + 1)
-        ]
-    )
-    for i in range(100):
-        signal = mutate(signal)
 
-    print(signal)
+def tail_phase(digits, buffer):
+    """
+    Apply one phase to a tail in place - each digit becomes the sum of itself
+    and every digit after it, mod 10
+
+    The sums are taken back to front a chunk at a time in `buffer`, carrying
+    each chunk's last sum into the next, so a phase allocates nothing.
+    """
+    backwards = digits[::-1]
+    carry = 0
 
+    for start in range(0, len(backwards), len(buffer)):
+        chunk = backwards[start : start + len(buffer)]
+        sums = buffer[: len(chunk)]
+        numpy.cumsum(chunk, dtype=buffer.dtype, out=sums)
+        sums += carry
+        numpy.remainder(sums, 10, out=sums)
+        chunk[:] = sums
+        carry = sums[-1]
 
-def pt2(signal):
+
+def pt2(signal, phases=100):
     """
     03036732577212944063491565474664 becomes 84462026
 
-    Once you are 91% through the signal (as we are) we can actually forget about the
-    front-end of the signal -> it's all just + from this point. This is a powerful thing.
+    Once you are past halfway through the signal (as the offset always is) we can
+    forget about the front-end of the signal -> it's all just + from this point.
+    So each phase is a sum of the tail from the back, and the message is the
+    first eight digits of the tail after the phases.
+    """
+    digits = tail(signal)
+    buffer = numpy.empty(min(CHUNK, len(digits)), dtype=numpy.uint32)
+
+    for _ in range(phases):
+        tail_phase(digits, buffer)
+
+    return "".join(map(str, digits[:8]))
+
+
+# C(n, k) mod 5 for single base 5 digits n and k
+BINOMIALS_MOD_5 = numpy.array([[math.comb(n, k) % 5 for k in range(5)] for n in range(5)])
 
-    We just need to track how the signal-tail sum changes - everything else is figured out.
 
-    Steps:
-        Find the sliver of the signal that you are actually interested in -> the offset to the offset + 8.
-        Calculate the sum of the signal after the sliver and take it modulo 10.
-            For each element in the signal, use the signal-tail-sum and the old digit to determine the new digit.
-            Recalculate the sum of the signal-tail.
-            Repeat
+def coefficients(phases, length):
     """
-    offset = int(signal[:7])
-    signal = [int(x) for x in signal]
-    original_signal_length = len(signal)
-    complete_signal_length = original_signal_length * 1e5
+    C(phases - 1 + k, k) mod 10 for k below length - how much the digit k places
+    further along the tail adds to a digit after that many phases
+
+    Mod 2 the coefficient is odd exactly when k and phases - 1 share no bits.
+    Mod 5 it comes from Lucas' theorem, a product of the binomials of the base 5
+    digits, and the two are combined with the Chinese remainder theorem.
+    """
+    k = numpy.arange(length, dtype=numpy.int64)
+    n = k + (phases - 1)
 
-    print(offset / complete_signal_length)
-    not_skipped = complete_signal_length - offset
+    mod2 = ((k & (phases - 1)) == 0).astype(numpy.int64)
 
-    # first truncate the signal to only be the last 9% or so -> the digits in front do not matter
-    quotient, remainder = divmod(offset, original_signal_length)
-    piece = (signal * 2)[remainder : remainder + 8]
+    mod5 = numpy.ones(length, dtype=numpy.int64)
+    power = 1
+    while power <= n[-1]:
+        mod5 = mod5 * BINOMIALS_MOD_5[n // power % 5, k // power % 5] % 5
+        power *= 5
 
-    # we have to construct the tail of the signal
-    signal_tail = (signal * 2)[remainder + 8 :] + signal * (
-        int(not_skipped // len(signal)) - 1
-    )
+    # 5 is 1 mod 2 and 0 mod 5, 6 is 0 mod 2 and 1 mod 5
+    return (5 * mod2 + 6 * mod5) % 10
 
-    print(f"SIGNAL TAIL IS {len(signal_tail)} LONG")
-    print(len(signal_tail) + offset + 8)
-    print(len(signal))
-    # now find the sum of the signal and how many times it has been applied
-    signal_sum = sum(signal)
-    # each element has the `signal_sum` added `quotient` times before we consider the tail
-    signal_tail_sum = signal_sum * quotient
 
-    for _ in range(100):
-        # update signal tail sum and relevant section
-        pass
+def jump(signal, phases=100):
+    """
+    The same message as `pt2`, worked out straight from the tail without
+    running the phases one after another
+
+    After p phases each digit is the sum of the digit k places further on times
+    C(p - 1 + k, k), mod 10, so the time taken does not depend on the number of
+    phases.
+    """
+    digits = tail(signal)
+    if not phases:
+        return "".join(map(str, digits[:8]))
+
+    weights = coefficients(phases, len(digits))
+    values = digits.astype(numpy.int64)
+    return "".join(
+        str(numpy.dot(weights[: len(values) - i], values[i:]) % 10) for i in range(8)
+    )
 
 
 if __name__ == "__main__":
 
-    pt1("12345")
-    pt1("1234512345")
+    print(pt1("80871224585914546619083218645595"))
+    print(pt2("03036732577212944063491565474664"))
+    print(jump("03036732577212944063491565474664", phases=10 ** 6))
@@ -1,5 +1,9 @@
 import json
 
+import numpy
+
+import fft
+
 """
 The last digit is repeats itself. That's because the 'pattern' dictates that it's just itself modulo 10 each time.
 The second-last digit has a periodicity equal to 10 / (10 - the last digit) (5 in this case). because you add the last digit to it each time.
@@ -52,36 +56,26 @@ After 3 phases: 03415518
 After 4 phases: 01029498
 """
 _signal = "59767332893712499303507927392492799842280949032647447943708128134759829623432979665638627748828769901459920331809324277257783559980682773005090812015194705678044494427656694450683470894204458322512685463108677297931475224644120088044241514984501801055776621459006306355191173838028818541852472766531691447716699929369254367590657434009446852446382913299030985023252085192396763168288943696868044543275244584834495762182333696287306000879305760028716584659188511036134905935090284404044065551054821920696749822628998776535580685208350672371545812292776910208462128008216282210434666822690603370151291219895209312686939242854295497457769408869210686246"
-signal = [int(x) for x in _signal]
-base_pattern = [0, 1, 0, -1] * (4 * len(signal) // 4)
 
 
 def next_phase(signal):
+    """
+    Apply one phase to a list of digits
+    """
+    return fft.phase(numpy.array(signal, dtype=numpy.uint8)).tolist()
 
-    output = []
-
-    for i, digit in enumerate(signal):
-        pattern = [
-            i
-            for j in [[element for _ in range(i + 1)] for element in base_pattern]
-            for i in j
-        ][1 : len(signal) + 1]
-        pairs = [x * y for x, y in zip(signal, pattern)]
-        result = sum(pairs)
-        output.append(abs(result) % 10)
 
-    return output
+if __name__ == "__main__":
 
+    signal = [int(x) for x in _signal]
+    r = []
+    for i in range(100):
+        print(i)
+        r.append(signal)
+        signal = next_phase(signal)
 
-r = []
-for i in range(100):
-    print(i)
     r.append(signal)
-    signal = next_phase(signal)
-
-r.append(signal)
-with open("s.json", "w") as file:
-    json.dump(r, file)
-
+    with open("s.json", "w") as file:
+        json.dump(r, file)
 
-print(signal[:8])
+    print(signal[:8])
@@ -0,0 +1,100 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import errors
+from memory import Memory
+
+# magic, version, number of words, sha256 of the words
+HEADER = struct.Struct("<4sHQ32s")
+MAGIC = b"ICIM"
+VERSION = 1
+
+CACHE = ".intcode-cache"
+
+
+def parse(program):
+    """
+    Turn a comma separated program into a list of ints
+    """
+    if isinstance(program, str):
+        program = [int(n) for n in program.replace("\n", "").split(",")]
+    return program
+
+
+def encode(program):
+    """
+    Encode a program as a binary image
+    """
+    try:
+        words = array("q", parse(program))
+    except OverflowError:
+        raise errors.ImageError("program has values that do not fit in 64 bits")
+
+    if words.itemsize != 8:
+        raise errors.ImageError("no 64 bit array type on this platform")
+
+    if sys.byteorder == "big":
+        words.byteswap()
+
+    payload = words.tobytes()
+    header = HEADER.pack(MAGIC, VERSION, len(words), hashlib.sha256(payload).digest())
+    return header + payload
+
+
+def save(program, path):
+    """
+    Write a program image to a file
+    """
+    with open(path, "wb") as file:
+        file.write(encode(program))
+
+
+def load(path, verify=True):
+    """
+    Memory-map a program image into a Memory, ready to pass to a Computer
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapped) < HEADER.size:
+        raise errors.ImageError("%s is too short to be a program image" % path)
+
+    magic, version, length, digest = HEADER.unpack_from(mapped)
+
+    if magic != MAGIC or version != VERSION:
+        raise errors.ImageError("%s is not a version %s program image" % (path, VERSION))
+
+    payload = memoryview(mapped)[HEADER.size : HEADER.size + 8 * length]
+
+    if len(payload) != 8 * length:
+        raise errors.ImageError("%s is truncated" % path)
+
+    if verify and hashlib.sha256(payload).digest() != digest:
+        raise errors.ImageError("%s does not match its content hash" % path)
+
+    return Memory.from_image(payload)
+
+
+def cached(program, directory=CACHE):
+    """
+    Load a program through the image cache, converting it the first time it is seen
+
+    Text programs are keyed by the hash of their text, so a cache hit skips
+    parsing altogether.
+    """
+    text = program if isinstance(program, str) else ",".join(map(str, program))
+    key = hashlib.sha256(text.strip().encode()).hexdigest()
+    path = os.path.join(directory, key + ".icim")
+
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # write then rename so concurrent loaders never see half an image
+        partial = "%s.%s" % (path, os.getpid())
+        save(program, partial)
+        os.replace(partial, path)
+
+    return load(path, verify=False)
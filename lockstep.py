@@ -0,0 +1,251 @@
+import itertools
+import json
+
+import numpy
+
+import errors
+from codes import (
+    ADD,
+    ADJUSTRBASE,
+    BREAK,
+    EQUALS,
+    JUMPIFFALSE,
+    JUMPIFTRUE,
+    LESSTHAN,
+    MULTIPLY,
+    OUTPUT,
+    SAVE,
+    OpCodes,
+)
+from modes import Modes
+
+# steps a group of machines runs before the groups are rebuilt
+REGROUP = 64
+
+# memory is dense, so addresses beyond this are refused rather than allocated
+MAX_WIDTH = 1 << 24
+
+
+class Lockstep:
+    """
+    Many instances of one program run in lockstep
+
+    Each machine's memory is a row of a 2-D int64 array. Machines at the same
+    pointer are stepped together as one group, and a group that branches apart
+    is regrouped by pointer. Arithmetic that would overflow 64 bits raises
+    OverflowError rather than silently giving results that differ from Computer,
+    and addresses beyond MAX_WIDTH raise MemoryError.
+    """
+
+    def __init__(self, program, inputs):
+
+        if isinstance(program, str):
+            program = [int(n) for n in program.replace("\n", "").split(",")]
+
+        count = len(inputs)
+        width = max(1024, 2 * len(program))
+
+        self.memory = numpy.zeros((count, width), dtype=numpy.int64)
+        self.memory[:, : len(program)] = program
+
+        self.pointer = numpy.zeros(count, dtype=numpy.int64)
+        self.relative_base = numpy.zeros(count, dtype=numpy.int64)
+        self.finished = numpy.zeros(count, dtype=bool)
+        self.waiting = numpy.zeros(count, dtype=bool)
+        self.steps = numpy.zeros(count, dtype=numpy.int64)
+
+        longest = max((len(values) for values in inputs), default=0)
+        self.inputs = numpy.zeros((count, max(longest, 1)), dtype=numpy.int64)
+        for row, values in enumerate(inputs):
+            self.inputs[row, : len(values)] = values
+        self.input_count = numpy.array([len(values) for values in inputs], dtype=numpy.int64)
+        self.input_cursor = numpy.zeros(count, dtype=numpy.int64)
+
+        self.outputs = numpy.zeros((count, 16), dtype=numpy.int64)
+        self.output_count = numpy.zeros(count, dtype=numpy.int64)
+
+        self.opcodes = OpCodes()
+
+    def run(self):
+        """
+        Run every machine until it halts or runs out of input, and return the
+        outputs of each
+        """
+        while True:
+            rows = numpy.flatnonzero(~self.finished & ~self.waiting)
+            if not rows.size:
+                break
+
+            pointers = self.pointer[rows]
+            values, counts = numpy.unique(pointers, return_counts=True)
+            group = rows[pointers == values[counts.argmax()]]
+
+            for _ in range(REGROUP):
+                group = self.step(group)
+                if not group.size:
+                    break
+                pointers = self.pointer[group]
+                if (pointers != pointers[0]).any():
+                    break
+
+        return [
+            self.outputs[row, : self.output_count[row]].tolist()
+            for row in range(len(self.outputs))
+        ]
+
+    def step(self, group):
+        """
+        Run the instruction under the pointer of a group of machines that share a
+        pointer, returning the machines that are still running
+        """
+        pointer = int(self.pointer[group[0]])
+        if pointer < 0:
+            raise IndexError("negative address: %s" % pointer)
+        self.grow(pointer + 4)
+
+        words = self.memory[group, pointer]
+        if (words != words[0]).any():
+            # self-modified code: step each distinct instruction separately
+            for word in numpy.unique(words):
+                self.step(group[words == word])
+            return group[~self.finished[group] & ~self.waiting[group]]
+
+        opcode, modes = self.opcodes.parse(int(words[0]))
+        parameters = self.memory[group, pointer + 1 : pointer + 1 + opcode.PARAMETERS]
+        following = pointer + 1 + opcode.PARAMETERS
+
+        if opcode.CODE == SAVE.CODE:
+            starved = self.input_cursor[group] >= self.input_count[group]
+            self.waiting[group[starved]] = True
+            group, parameters = group[~starved], parameters[~starved]
+            if not group.size:
+                return group
+            target = self.target(group, modes[0], parameters[:, 0])
+            self.memory[group, target] = self.inputs[group, self.input_cursor[group]]
+            self.input_cursor[group] += 1
+
+        elif opcode.CODE == OUTPUT.CODE:
+            value = self.value(group, modes[0], parameters[:, 0])
+            if self.output_count[group].max() >= self.outputs.shape[1]:
+                self.outputs = numpy.pad(self.outputs, ((0, 0), (0, self.outputs.shape[1])))
+            self.outputs[group, self.output_count[group]] = value
+            self.output_count[group] += 1
+
+        elif opcode.CODE in (ADD.CODE, MULTIPLY.CODE, LESSTHAN.CODE, EQUALS.CODE):
+            a = self.value(group, modes[0], parameters[:, 0])
+            b = self.value(group, modes[1], parameters[:, 1])
+            target = self.target(group, modes[2], parameters[:, 2])
+            self.memory[group, target] = self.evaluate(opcode, a, b)
+
+        elif opcode.CODE in (JUMPIFTRUE.CODE, JUMPIFFALSE.CODE):
+            condition = self.value(group, modes[0], parameters[:, 0]) != 0
+            if opcode.CODE == JUMPIFFALSE.CODE:
+                condition = ~condition
+            destination = self.value(group, modes[1], parameters[:, 1])
+            self.pointer[group] = numpy.where(condition, destination, following)
+            self.steps[group] += 1
+            return group
+
+        elif opcode.CODE == ADJUSTRBASE.CODE:
+            self.relative_base[group] += self.value(group, modes[0], parameters[:, 0])
+
+        elif opcode.CODE == BREAK.CODE:
+            self.finished[group] = True
+            self.pointer[group] = following
+            self.steps[group] += 1
+            return group[:0]
+
+        self.pointer[group] = following
+        self.steps[group] += 1
+        return group
+
+    @staticmethod
+    def evaluate(opcode, a, b):
+        """
+        Apply an arithmetic or comparison instruction
+        """
+        if opcode.CODE == LESSTHAN.CODE:
+            return (a < b).astype(numpy.int64)
+
+        if opcode.CODE == EQUALS.CODE:
+            return (a == b).astype(numpy.int64)
+
+        with numpy.errstate(over="ignore"):
+            if opcode.CODE == ADD.CODE:
+                result = a + b
+                overflow = ((a ^ result) & (b ^ result)) < 0
+            else:
+                result = a * b
+                safe = a != 0
+                overflow = numpy.zeros(len(a), dtype=bool)
+                overflow[safe] = (result[safe] // a[safe] != b[safe]) | (
+                    (a[safe] == -1) & (b[safe] == numpy.iinfo(numpy.int64).min)
+                )
+
+        if overflow.any():
+            raise OverflowError("%s overflows 64 bits" % opcode.NAME)
+
+        return result
+
+    def value(self, group, mode, parameters):
+        """
+        Read an operand for each machine in a group
+        """
+        if mode == Modes.IMMEDIATE:
+            return parameters
+
+        # resolve first, as resolving may grow (and so replace) the memory
+        addresses = self.address(group, mode, parameters)
+        return self.memory[group, addresses]
+
+    def target(self, group, mode, parameters):
+        """
+        The address each machine in a group writes to
+        """
+        return self.address(group, Modes.POSITION if not mode else Modes.RELATIVE, parameters)
+
+    def address(self, group, mode, parameters):
+        """
+        Resolve a position or relative mode parameter to an address
+        """
+        if mode == Modes.POSITION:
+            addresses = parameters
+        elif mode == Modes.RELATIVE:
+            addresses = parameters + self.relative_base[group]
+        else:
+            raise errors.UnknownModeError(mode)
+
+        if addresses.min() < 0:
+            raise IndexError("negative address: %s" % addresses.min())
+
+        self.grow(int(addresses.max()))
+        return addresses
+
+    def grow(self, address):
+        """
+        Widen every machine's memory to hold an address
+        """
+        width = self.memory.shape[1]
+        if address >= MAX_WIDTH:
+            raise MemoryError("address %s is beyond the lockstep engine's memory" % address)
+        if address >= width:
+            while address >= width:
+                width *= 2
+            self.memory = numpy.pad(self.memory, ((0, 0), (0, width - self.memory.shape[1])))
+
+
+def run_lockstep(program, inputs):
+    """
+    Run a program once per input vector in lockstep, returning each run's outputs
+    """
+    return Lockstep(program, inputs).run()
+
+
+if __name__ == "__main__":
+
+    with open("inputs.json", "r") as file:
+        program = json.load(file)["tractor"]
+
+    # tractor beam scan: every (x, y) probe runs as one machine in the batch
+    probes = [list(probe) for probe in itertools.product(range(50), repeat=2)]
+    print(sum(outputs[0] for outputs in run_lockstep(program, probes)))
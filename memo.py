@@ -0,0 +1,123 @@
+import collections
+import hashlib
+import json
+import os
+import struct
+
+import errors
+from computer import Computer
+
+# methods whose overrides can bring in state from outside the program
+HOOKS = ("run", "read_next_instruction", "get_inputs", "process_outputs", "post_process")
+
+
+def check_pure(computer):
+    """
+    Raise ImpureMachineError unless a machine's outputs depend only on its
+    program and inputs
+    """
+    overridden = [
+        hook
+        for hook in HOOKS
+        if hook in vars(computer) or getattr(type(computer), hook) is not getattr(Computer, hook)
+    ]
+    if overridden:
+        raise errors.ImpureMachineError(
+            "%s overrides %s" % (type(computer).__name__, ", ".join(overridden))
+        )
+
+
+def fingerprint(computer, inputs):
+    """
+    Hash of everything a run of a machine depends on
+    """
+    digest = hashlib.sha256()
+    digest.update(struct.pack("<qq", computer.pointer, computer.relative_base))
+    digest.update(repr((list(computer.inputs), list(inputs))).encode())
+    # memory keeps the hashes of its pages until they are written
+    digest.update(computer.program.digest())
+
+    return digest.hexdigest()
+
+
+class RunCache:
+    """
+    Opt-in cache of whole runs, keyed by a hash of the machine and its inputs
+
+    Keeps up to `size` results in memory, least recently used first out, and
+    optionally every result on disk under `directory`. Only plain machines are
+    cached - anything overriding an input or output hook is refused, as its
+    outputs may depend on more than its inputs.
+    """
+
+    def __init__(self, size=4096, directory=None):
+        self.size = size
+        self.directory = directory
+        self.results = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, program, inputs=()):
+        """
+        Run a program, or a fork of a machine, until it halts or runs out of
+        inputs, returning its outputs
+        """
+        machine = program if isinstance(program, Computer) else Computer(program)
+        check_pure(machine)
+
+        key = fingerprint(machine, inputs)
+        outputs = self.get(key)
+
+        if outputs is None:
+            self.misses += 1
+            outputs = machine.fork().run(inputs=list(inputs), early_stopping=True)
+            self.put(key, outputs)
+        else:
+            self.hits += 1
+
+        return list(outputs)
+
+    def get(self, key):
+        """
+        Outputs recorded under a key, or None
+        """
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        if self.directory is not None:
+            try:
+                with open(self.path(key), "r") as file:
+                    outputs = json.load(file)
+            except FileNotFoundError:
+                return None
+            self.remember(key, outputs)
+            return outputs
+
+        return None
+
+    def put(self, key, outputs):
+        """
+        Record the outputs of a run
+        """
+        self.remember(key, outputs)
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            # write then rename so concurrent readers never see half a result
+            partial = "%s.%s" % (self.path(key), os.getpid())
+            with open(partial, "w") as file:
+                json.dump(outputs, file)
+            os.replace(partial, self.path(key))
+
+    def remember(self, key, outputs):
+        """
+        Keep outputs in memory, evicting the least recently used beyond `size`
+        """
+        self.results[key] = outputs
+        self.results.move_to_end(key)
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".json")
@@ -0,0 +1,171 @@
+import hashlib
+import struct
+import sys
+from array import array
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+OFFSET_MASK = PAGE_SIZE - 1
+
+
+class Memory:
+    """
+    Paged memory with an effectively unbounded address space
+
+    Pages are allocated the first time they are written to and are backed by
+    int64 arrays. A page falls back to a list of Python ints if it ever has to
+    hold a value that does not fit in 64 bits. Memory built from a program image
+    reads each page from the image the first time it is touched.
+    """
+
+    def __init__(self, values=()):
+
+        self.pages = {}
+        # pages shared with a copy, which must be copied before they are written
+        self.shared = set()
+        # little-endian int64 words that pages are loaded from on first use
+        self.image = None
+        # page index -> hash of the page, dropped when the page is written
+        self.digests = {}
+        self.image_digest = None
+
+        values = list(values)
+        for start in range(0, len(values), PAGE_SIZE):
+            chunk = values[start : start + PAGE_SIZE]
+            self.pages[start >> PAGE_BITS] = self.new_page(chunk)
+
+    def __getitem__(self, address):
+
+        try:
+            return self.pages[address >> PAGE_BITS][address & OFFSET_MASK]
+        except KeyError:
+            if address < 0:
+                raise IndexError("negative address: %s" % address)
+            if self.image is not None and address < len(self.image) // 8:
+                return self.load_page(address >> PAGE_BITS)[address & OFFSET_MASK]
+            return 0
+
+    def __setitem__(self, address, value):
+
+        index = address >> PAGE_BITS
+        if self.digests:
+            self.digests.pop(index, None)
+        if index in self.shared:
+            self.unshare(index)
+
+        page = self.pages.get(index)
+
+        if page is None:
+            if address < 0:
+                raise IndexError("negative address: %s" % address)
+            if self.image is not None and address < len(self.image) // 8:
+                page = self.load_page(index)
+            else:
+                page = self.pages[index] = self.new_page()
+
+        try:
+            page[address & OFFSET_MASK] = value
+        except OverflowError:
+            page = self.pages[index] = page.tolist()
+            page[address & OFFSET_MASK] = value
+
+    def __getstate__(self):
+
+        # pages still in the image are copied in, as the image cannot be saved
+        if self.image is not None:
+            for index in range(-(-len(self.image) // (8 * PAGE_SIZE))):
+                if index not in self.pages:
+                    self.load_page(index)
+
+        return {"pages": self.pages}
+
+    def __setstate__(self, state):
+
+        self.pages = state["pages"]
+        self.shared = set()
+        self.image = None
+        self.digests = {}
+        self.image_digest = None
+
+    def copy(self):
+        """
+        Copy-on-write copy - pages are shared until either side writes to them
+        """
+        other = Memory()
+        other.pages = dict(self.pages)
+        other.shared = set(self.pages)
+        other.image = self.image
+        other.digests = dict(self.digests)
+        other.image_digest = self.image_digest
+        self.shared = set(self.pages)
+        return other
+
+    def digest(self):
+        """
+        Hash of the contents, reusing the hash of every page not written since
+        it was last taken
+        """
+        digest = hashlib.sha256()
+
+        for index in sorted(self.pages):
+            page_digest = self.digests.get(index)
+            if page_digest is None:
+                page = self.pages[index]
+                data = page.tobytes() if isinstance(page, array) else repr(page).encode()
+                page_digest = hashlib.sha256(struct.pack("<q", index) + data).digest()
+                self.digests[index] = page_digest
+            digest.update(page_digest)
+
+        if self.image is not None:
+            if self.image_digest is None:
+                self.image_digest = hashlib.sha256(self.image).digest()
+            digest.update(self.image_digest)
+
+        return digest.digest()
+
+    @classmethod
+    def from_image(cls, image):
+        """
+        Memory over a buffer of little-endian int64 words, such as a memory map
+        """
+        memory = cls()
+        memory.image = memoryview(image).cast("B")
+        return memory
+
+    def load_page(self, index):
+        """
+        Copy a page in from the image
+        """
+        page = array("q")
+        page.frombytes(self.image[index * PAGE_SIZE * 8 : (index + 1) * PAGE_SIZE * 8])
+        if sys.byteorder == "big":
+            page.byteswap()
+        page.extend([0] * (PAGE_SIZE - len(page)))
+
+        self.pages[index] = page
+        return page
+
+    def unshare(self, index):
+        """
+        Take a private copy of a shared page
+        """
+        self.pages[index] = self.pages[index][:]
+        self.shared.discard(index)
+
+    @staticmethod
+    def new_page(values=()):
+        """
+        Build a page, padded with zeros
+        """
+        values = list(values) + [0] * (PAGE_SIZE - len(values))
+
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+
+    def size(self):
+        """
+        Number of addresses held in allocated pages
+        """
+        return len(self.pages) * PAGE_SIZE
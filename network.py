@@ -0,0 +1,197 @@
+import asyncio
+import time
+
+import errors
+from computer import Computer
+
+NAT = 255
+NO_PACKET = -1
+
+
+class Node(Computer):
+    """
+    Networked computer - outputs are routed as packets by the network
+    """
+
+    def process_outputs(self, output):
+        """
+        Outputs are collected from `run`, so there is nothing to do here
+        """
+        pass
+
+
+class Mailbox:
+    """
+    Packet queue for one machine, with depth and latency metrics
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.delivered = 0
+        self.max_depth = 0
+        self.total_latency = 0.0
+
+    def put(self, packet):
+        self.queue.put_nowait((time.perf_counter(), packet))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def get_nowait(self):
+        return self.receive(self.queue.get_nowait())
+
+    async def get(self):
+        return self.receive(await self.queue.get())
+
+    def receive(self, item):
+        sent, packet = item
+        self.delivered += 1
+        self.total_latency += time.perf_counter() - sent
+        return packet
+
+    def empty(self):
+        return self.queue.empty()
+
+    def metrics(self):
+        """
+        Queue depth and latency
+        """
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "mean_latency": self.total_latency / self.delivered
+            if self.delivered
+            else 0.0,
+        }
+
+
+class Network:
+    """
+    Network of Intcode machines, each running as an asyncio task
+
+    Every machine is booted with its address and then sends packets as triples
+    of (address, x, y) outputs. A machine whose mailbox is empty is given
+    `NO_PACKET` once; if that produces nothing it is idle and waits on its
+    mailbox without spinning. When every machine is idle the NAT sends the last
+    packet it received to address 0.
+    """
+
+    def __init__(self, program, size, machine=Node):
+
+        self.machines = {address: machine(program) for address in range(size)}
+        self.mailboxes = {address: Mailbox() for address in range(size)}
+        self.idle = set()
+        self.running = size
+        self.all_idle = asyncio.Event()
+        self.first_nat_packet = None
+        self.nat_packet = None
+
+    def send(self, address, x, y):
+        """
+        Route a packet
+        """
+        if address == NAT:
+            self.nat_packet = (x, y)
+            if self.first_nat_packet is None:
+                self.first_nat_packet = (x, y)
+            return
+
+        self.mailboxes[address].put((x, y))
+        self.idle.discard(address)
+
+    async def run_machine(self, address):
+        """
+        Run one machine until it halts
+        """
+        machine = self.machines[address]
+        mailbox = self.mailboxes[address]
+        inputs = [address]
+        pending = []
+
+        while not machine.finished:
+
+            outputs = machine.run(inputs=inputs, early_stopping=True)
+            pending += outputs
+
+            while len(pending) >= 3:
+                self.send(*pending[:3])
+                del pending[:3]
+
+            if machine.finished:
+                break
+
+            if not mailbox.empty():
+                inputs = [*mailbox.get_nowait()]
+
+            elif outputs or inputs != [NO_PACKET]:
+                inputs = [NO_PACKET]
+
+            else:
+                self.idle.add(address)
+                if len(self.idle) == self.running:
+                    self.all_idle.set()
+                inputs = [*await mailbox.get()]
+                continue
+
+            # let the other machines run
+            await asyncio.sleep(0)
+
+        self.running -= 1
+        self.all_idle.set()
+
+    async def run_nat(self):
+        """
+        Wake address 0 whenever the network is idle, and return the first y value
+        delivered twice in a row (None if every machine halts)
+
+        Raises DeadlockError if the network goes idle before any packet has been
+        sent to the NAT, as then nothing can ever wake it.
+        """
+        last_y = None
+
+        while self.running:
+
+            await self.all_idle.wait()
+            self.all_idle.clear()
+
+            if len(self.idle) < self.running:
+                continue
+
+            if self.nat_packet is None:
+                raise errors.DeadlockError("the network is idle and the NAT has no packet")
+
+            x, y = self.nat_packet
+            if y == last_y:
+                return y
+
+            last_y = y
+            self.send(0, x, y)
+
+    async def run(self):
+        """
+        Run the network
+        """
+        machines = [
+            asyncio.ensure_future(self.run_machine(address))
+            for address in self.machines
+        ]
+        nat = asyncio.ensure_future(self.run_nat())
+        pending = {nat, *machines}
+
+        try:
+            # a machine that fails would otherwise leave the NAT waiting forever
+            while not nat.done():
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        raise task.exception()
+            return nat.result()
+        finally:
+            for task in [nat, *machines]:
+                task.cancel()
+            await asyncio.gather(nat, *machines, return_exceptions=True)
+
+    def metrics(self):
+        """
+        Per-mailbox depth and latency
+        """
+        return {address: mailbox.metrics() for address, mailbox in self.mailboxes.items()}
@@ -0,0 +1,252 @@
+import collections
+import json
+import time
+
+from codes import ADJUSTRBASE, JUMPIFFALSE, JUMPIFTRUE
+from computer import Computer
+from modes import Modes
+
+MODE_NAMES = {Modes.POSITION: "POSITION", Modes.IMMEDIATE: "IMMEDIATE", Modes.RELATIVE: "RELATIVE"}
+
+
+class ProfiledMemory:
+    """
+    Memory wrapper that counts writes per address
+    """
+
+    def __init__(self, memory, writes):
+        self.memory = memory
+        self.writes = writes
+
+    def __getitem__(self, address):
+        return self.memory[address]
+
+    def __setitem__(self, address, value):
+        self.writes[address] += 1
+        self.memory[address] = value
+
+    def __getattr__(self, name):
+        return getattr(self.memory, name)
+
+
+class Profiler:
+    """
+    Opcode, address and memory profiler for a Computer
+
+    Attaching wraps the machine's `execute` and memory on the instance, so an
+    unprofiled machine runs exactly the same code as before.
+    """
+
+    def __init__(self):
+        self.computer = None
+        self.opcodes = collections.Counter()
+        self.addresses = collections.Counter()
+        self.modes = collections.Counter()
+        self.reads = collections.Counter()
+        self.writes = collections.Counter()
+        self.started = None
+        self.elapsed = 0.0
+
+    def attach(self, computer):
+        """
+        Start profiling a machine
+        """
+        execute = computer.execute
+        opcodes, addresses, modes_used = self.opcodes, self.addresses, self.modes
+        reads = self.reads
+
+        def count(opcode, address, modes, parameters):
+            opcodes[opcode.NAME] += 1
+            addresses[address] += 1
+            # data reads are the operands other than the one written to
+            operands = opcode.PARAMETERS - opcode.WRITES
+            for i, (mode, parameter) in enumerate(zip(modes[: opcode.PARAMETERS], parameters)):
+                modes_used[mode] += 1
+                if i < operands and mode == Modes.POSITION:
+                    reads[parameter] += 1
+                elif i < operands and mode == Modes.RELATIVE:
+                    reads[parameter + computer.relative_base] += 1
+
+        def profiled(opcode, parameters, modes, inputs):
+            # the pointer has already moved past the opcode and its parameters
+            address = computer.pointer - len(parameters) - 1
+            second = getattr(opcode, "second", None)
+
+            if second is None:
+                count(opcode, address, modes, parameters)
+                return execute(opcode, parameters, modes, inputs)
+
+            # a fused pair counts as both of its instructions, though the second
+            # does not run when the first rewrites it, and the operands the
+            # second takes from the first count as reads all the same
+            first = opcode.first
+            count(first, address, modes, parameters)
+            steps = computer.steps
+            output = execute(opcode, parameters, modes, inputs)
+            if computer.steps > steps:
+                start = first.PARAMETERS + 1
+                count(second, address + start, opcode.modes, parameters[start:])
+            return output
+
+        computer.execute = profiled
+        computer.program = ProfiledMemory(computer.program, self.writes)
+
+        self.computer = computer
+        self.started = time.perf_counter()
+        return self
+
+    def detach(self):
+        """
+        Stop profiling, putting the machine back as it was
+        """
+        self.elapsed += time.perf_counter() - self.started
+        del self.computer.execute
+        self.computer.program = self.computer.program.memory
+        self.computer = None
+
+    def report(self):
+        """
+        Summarise the profile
+        """
+        elapsed = self.elapsed
+        if self.computer is not None:
+            elapsed += time.perf_counter() - self.started
+
+        instructions = sum(self.opcodes.values())
+
+        return {
+            "instructions": instructions,
+            "seconds": elapsed,
+            "instructions_per_second": instructions / elapsed if elapsed else 0.0,
+            "opcodes": dict(self.opcodes.most_common()),
+            "modes": {MODE_NAMES.get(k, str(k)): v for k, v in self.modes.items()},
+            "addresses": {str(k): v for k, v in self.addresses.most_common()},
+            "reads": {str(k): v for k, v in self.reads.most_common()},
+            "writes": {str(k): v for k, v in self.writes.most_common()},
+        }
+
+    def dump(self, path):
+        """
+        Write the report as JSON
+        """
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class StackProfiler:
+    """
+    Sampling profiler that infers the call stack of an Intcode program
+
+    Intcode has no call instruction, but compiled programs follow a convention:
+    a call is a jump to an immediate address that starts by raising the relative
+    base to make room for its frame, and a return lowers it again and jumps to
+    an address held in memory. The inferred stack is sampled every `interval`
+    instructions and reported in the folded format flame graph tools read.
+    Compiled blocks bypass `execute`, so profile on the decoded engine.
+    """
+
+    def __init__(self, interval=100, names=None):
+        self.interval = interval
+        self.names = names or {}
+        self.samples = collections.Counter()
+        self.computer = None
+        # (function address, relative base at the call) for each active call
+        self.stack = []
+
+    def attach(self, computer):
+        """
+        Start profiling a machine
+        """
+        execute = computer.execute
+        jumps = (JUMPIFTRUE.CODE, JUMPIFFALSE.CODE)
+        # a jump to an immediate address, which is a call if it lands on an ARB
+        called = None
+        due = computer.steps + self.interval
+
+        def profiled(opcode, parameters, modes, inputs):
+            nonlocal called, due
+
+            # fused instructions end with the jump, if they have one
+            last = getattr(opcode, "second", opcode)
+            last_modes = getattr(opcode, "modes", modes)
+            address = computer.pointer - len(parameters) - 1
+            base = computer.relative_base
+
+            output = execute(opcode, parameters, modes, inputs)
+
+            if last.CODE == ADJUSTRBASE.CODE:
+                if address == called and computer.relative_base > base:
+                    self.stack.append((address, base))
+                called = None
+
+            elif last.CODE in jumps and computer.pointer != address + len(parameters) + 1:
+                if last_modes[1] == Modes.IMMEDIATE:
+                    called = computer.pointer
+                else:
+                    # a return: drop every frame at or above the restored base
+                    called = None
+                    while self.stack and self.stack[-1][1] >= computer.relative_base:
+                        self.stack.pop()
+
+            else:
+                called = None
+
+            if computer.steps >= due:
+                self.samples[tuple(function for function, _ in self.stack)] += 1
+                due = computer.steps + self.interval
+
+            return output
+
+        computer.execute = profiled
+        self.computer = computer
+        return self
+
+    def detach(self):
+        """
+        Stop profiling, putting the machine back as it was
+        """
+        del self.computer.execute
+        self.computer = None
+
+    def name(self, address):
+        return self.names.get(address, "fn_%s" % address)
+
+    def folded(self):
+        """
+        Samples as folded stacks - `main;fn_922;fn_400 57` - one stack per line
+        """
+        return "\n".join(
+            "%s %s" % (";".join(["main"] + [self.name(a) for a in stack]), count)
+            for stack, count in sorted(self.samples.items())
+        )
+
+    def dump(self, path):
+        """
+        Write the folded stacks to a file
+        """
+        with open(path, "w") as file:
+            file.write(self.folded() + "\n")
+
+
+if __name__ == "__main__":
+
+    with open("inputs.json", "r") as file:
+        program = json.load(file)["sensor_boost"]
+
+    computer = Computer(program)
+    profiler = Profiler().attach(computer)
+    computer.run(inputs=[2])
+    profiler.detach()
+
+    report = profiler.report()
+    print("%(instructions)s instructions at %(instructions_per_second).0f/s" % report)
+    print("hottest addresses:", list(report["addresses"].items())[:10])
+    profiler.dump("profile.json")
+
+    computer = Computer(program)
+    stacks = StackProfiler().attach(computer)
+    computer.run(inputs=[2])
+    stacks.detach()
+
+    print("hottest stacks:", stacks.samples.most_common(5))
+    stacks.dump("profile.folded")
@@ -0,0 +1,138 @@
+import collections
+import math
+import time
+
+import errors
+
+# instructions a machine may run before the next machine gets a turn
+BUDGET = 10_000
+
+
+class Scheduler:
+    """
+    Cooperative round-robin scheduler for many machines
+
+    Each turn runs one machine for at most `budget` instructions, so a machine
+    stuck in a loop only ever delays the others by one slice. Only runnable
+    machines are queued: a machine waiting for input is left alone until `send`
+    gives it some, and finished machines are dropped. Outputs from each slice
+    are sent to every machine the machine `feeds`, then handed to its
+    `on_output` callback, which can `send` them on itself.
+
+    Machines fed through channels with a capacity get backpressure: a slice
+    stops once the fullest of them is full, and a machine with nowhere to put
+    its outputs is left alone until one of the machines it feeds has run.
+    """
+
+    def __init__(self, budget=BUDGET):
+        self.budget = budget
+        self.machines = {}
+        self.callbacks = {}
+        self.feeds = {}
+        # name -> the machines feeding it
+        self.upstream = collections.defaultdict(set)
+        self.stats = {}
+        self.runnable = collections.deque()
+        self.queued = set()
+        self.blocked = set()
+
+    def add(self, name, machine, inputs=(), on_output=None, feeds=()):
+        """
+        Add a machine, optionally with inputs, the names of the machines its
+        outputs go to, and a callback for its outputs
+        """
+        self.machines[name] = machine
+        self.callbacks[name] = on_output
+        self.feeds[name] = tuple(feeds)
+        for target in self.feeds[name]:
+            self.upstream[target].add(name)
+        self.stats[name] = {"instructions": 0, "seconds": 0.0, "slices": 0}
+        self.send(name, inputs)
+        self.wake(name)
+
+    def send(self, name, values):
+        """
+        Give a machine inputs, making it runnable again if it was waiting
+        """
+        machine = self.machines[name]
+        machine.inputs.feed(values)
+        if machine.waiting and len(machine.inputs):
+            self.wake(name)
+
+    def wake(self, name):
+        """
+        Queue a machine unless it is queued already or finished
+        """
+        if name not in self.queued and not self.machines[name].finished:
+            self.queued.add(name)
+            self.runnable.append(name)
+
+    def run(self, until=None):
+        """
+        Run until no machine is runnable, or `until()` is true after a slice
+
+        Raises DeadlockError if the machines left are all blocked on full
+        channels, as none of them can ever run again.
+        """
+        while self.runnable:
+
+            name = self.runnable.popleft()
+            self.queued.discard(name)
+            machine = self.machines[name]
+            stats = self.stats[name]
+
+            room = min(
+                (
+                    self.machines[target].inputs.room
+                    for target in self.feeds[name]
+                    if not self.machines[target].finished
+                ),
+                default=math.inf,
+            )
+            if room == 0:
+                self.blocked.add(name)
+                continue
+
+            steps = machine.steps
+            started = time.perf_counter()
+            outputs = machine.run(
+                early_stopping=True,
+                budget=self.budget,
+                max_outputs=None if room == math.inf else room,
+            )
+            stats["seconds"] += time.perf_counter() - started
+            stats["instructions"] += machine.steps - steps
+            stats["slices"] += 1
+
+            if outputs:
+                for target in self.feeds[name]:
+                    # nothing will ever read what is sent to a finished machine
+                    if not self.machines[target].finished:
+                        self.send(target, outputs)
+                if self.callbacks[name] is not None:
+                    self.callbacks[name](outputs)
+
+            # a machine that ran out of budget or room, or was sent inputs by a
+            # callback, goes to the back of the queue
+            if not machine.waiting or len(machine.inputs):
+                self.wake(name)
+
+            # and the machines blocked feeding this one may have room now
+            for producer in self.upstream[name] & self.blocked:
+                self.blocked.discard(producer)
+                self.wake(producer)
+
+            if until is not None and until():
+                break
+
+        else:
+            if self.blocked:
+                raise errors.DeadlockError(
+                    "machines %s are blocked on full channels" % sorted(self.blocked, key=str)
+                )
+
+    def metrics(self):
+        """
+        Wall time, instruction count and number of slices per machine
+        """
+        return {name: dict(stats) for name, stats in self.stats.items()}
@@ -0,0 +1,129 @@
+import functools
+import itertools
+import math
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import amplifier
+import feedback
+from batch import share
+
+# the program each worker searches, read from shared memory
+words = None
+
+
+def chain(program, phases, stages, prefix):
+    """
+    Best (signal, order) for amplifiers in a chain
+    """
+    return amplifier.search(program, phases, stages, prefix)[:2]
+
+
+# searches of the orders starting with a given prefix, by mode
+MODES = {"chain": chain, "feedback": feedback.search}
+
+# phase settings each mode uses unless told otherwise
+PHASES = {"chain": range(5), "feedback": range(5, 10)}
+
+
+def attach(name, length):
+    """
+    Worker initializer - read the program from the shared image
+    """
+    global words
+
+    block = shared_memory.SharedMemory(name=name)
+    image = block.buf.cast("q")
+    words = image[:length].tolist()
+    image.release()
+    block.close()
+
+
+def search_prefix(task):
+    """
+    Best (signal, order) among the orders starting with a prefix
+    """
+    mode, phases, stages, prefix = task
+    return MODES[mode](words, phases, stages, prefix)
+
+
+def combine(a, b):
+    """
+    The better of two (signal, order) results - the larger signal, or the
+    first order on a tie, so the answer does not depend on scheduling
+    """
+    if a[0] is None:
+        return b
+    if b[0] is None:
+        return a
+    if a[0] != b[0]:
+        return a if a[0] > b[0] else b
+    return min(a, b, key=lambda result: result[1])
+
+
+def split(phases, stages, processes):
+    """
+    Length of the prefixes to hand out - the shortest giving a few tasks per
+    worker, so every core stays busy while the last tasks finish
+    """
+    for depth in range(stages + 1):
+        if math.perm(len(phases), depth) >= 4 * processes:
+            return depth
+    return stages
+
+
+def search(program, mode="chain", phases=None, stages=None, processes=None, progress=None):
+    """
+    Find the order of phase settings giving the largest signal, splitting the
+    permutations across a process pool
+
+    Each task is every order starting with one prefix of phase settings, which
+    the worker searches itself (sharing runs between prefixes in chain mode),
+    so only one result per task crosses back to be combined. `progress`, when
+    given, is called after each task with the number of orders searched, the
+    total, and the seconds elapsed. Returns the largest signal and its order.
+    """
+    phases = list(PHASES[mode] if phases is None else phases)
+    stages = len(phases) if stages is None else stages
+    processes = processes or multiprocessing.cpu_count()
+
+    depth = split(phases, stages, processes)
+    tasks = [(mode, phases, stages, prefix) for prefix in itertools.permutations(phases, depth)]
+    # orders under each prefix
+    per_task = math.perm(len(phases) - depth, stages - depth)
+    total = len(tasks) * per_task
+
+    block, length = share(program)
+    started = time.perf_counter()
+    results = []
+
+    try:
+        with multiprocessing.Pool(processes, initializer=attach, initargs=(block.name, length)) as pool:
+            for result in pool.imap_unordered(search_prefix, tasks):
+                results.append(result)
+                if progress is not None:
+                    progress(len(results) * per_task, total, time.perf_counter() - started)
+    finally:
+        block.close()
+        block.unlink()
+
+    return functools.reduce(combine, results, (None, None))
+
+
+def report(done, total, elapsed):
+    """
+    Progress and throughput on stderr
+    """
+    rate = done / elapsed if elapsed else 0
+    sys.stderr.write("\r%d/%d orders, %.0f orders/s" % (done, total, rate))
+    if done == total:
+        sys.stderr.write("\n")
+
+
+if __name__ == "__main__":
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else "chain"
+
+    print(search(amplifier.get_program(), mode, progress=report))
@@ -0,0 +1,30 @@
+from itertools import permutations
+
+from amplifier import run_in_order, search
+
+PROGRAMS = {
+    "3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0": (43210, (4, 3, 2, 1, 0)),
+    "3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0": (
+        54321,
+        (0, 1, 2, 3, 4),
+    ),
+    "3,31,3,32,1002,32,10,32,1001,31,-2,31,1007,31,0,33,1002,33,7,33,1,33,31,31,1,32,"
+    "31,31,4,31,99,0,0,0": (65210, (1, 0, 4, 3, 2)),
+}
+
+
+def test_search():
+
+    for program, expected in PROGRAMS.items():
+        assert search(program) == expected + (325,)
+
+
+def test_search_matches_every_order():
+
+    program = next(iter(PROGRAMS))
+
+    best, order, runs = search(program, phases=range(6), stages=3)
+
+    assert runs == 6 + 6 * 5 + 6 * 5 * 4
+    assert best == max(run_in_order(o, program)[-1] for o in permutations(range(6), 3))
+    assert run_in_order(order, program) == [best]
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from assembler import disassemble, listing, optimize
+from computer import Computer
+
+
+def run(program, inputs):
+    computer = Computer(program)
+    outputs = computer.run(inputs=list(inputs))
+    return outputs, computer.steps
+
+
+def test_round_trip():
+
+    program = [1, 11, 12, 13, 1105, 1, 7, 4, 13, 99, 0, 5, 6, 0]
+    instructions, complete = disassemble(program)
+
+    assert complete
+    assert sorted(instructions) == [0, 4, 7, 9]
+    assert sum((i.words() for _, i in sorted(instructions.items())), []) == program[:10]
+    assert listing(program).splitlines()[1].split() == ["4", "JUMP-IF-TRUE", "1,", "7"]
+
+
+def test_optimize():
+
+    # jump to a jump, and a jump to the next instruction
+    for program in ("1105,1,3,1105,1,6,104,7,99", [1, 11, 12, 13, 1105, 1, 7, 4, 13, 99, 0, 5, 6, 0]):
+        outputs, steps = run(program, [])
+        assert run(optimize(program), []) == (outputs, steps - 1)
+
+
+def test_constants():
+
+    # 3 * 4 is compared with 10 and the result only decides a jump, so the
+    # comparison and the jump both go
+    program = [1102, 3, 4, 20, 1007, 20, 10, 21, 1005, 21, 14, 4, 20, 99, 104, -1, 99]
+    program += [0] * 5
+
+    outputs, steps = run(program, [])
+    assert run(optimize(program), []) == (outputs, steps - 2) == ([12], 3)
+
+    # with relative mode the program cannot be relocated, so the jumps that
+    # became no-ops are jumped over instead
+    program = [109, 1, 1107, 5, 3, 30, 1005, 30, 20, 1105, 0, 20, 204, 29, 99]
+    program += [0] * 5 + [104, 7, 99] + [0] * 10
+
+    outputs, steps = run(program, [])
+    assert run(optimize(program, written={30}), []) == (outputs, steps - 1)
+
+
+def test_indirect_jumps():
+
+    # the jump to 10 comes from memory, so the output reading the constant
+    # written at the start is never decoded and the write must stay
+    program = [1101, 5, 0, 20, 105, 1, 21, 99, 0, 0, 4, 20, 99] + [0] * 7 + [0, 10]
+
+    assert optimize(program) == program
+    assert run(optimize(program), []) == run(program, [])
+
+
+def test_tests_programs():
+
+    with open("tests.json", "r") as file:
+        tests = json.load(file)["computer"]
+
+    for name, [program, inputs, expected] in tests.items():
+        outputs, steps = run(optimize(program), inputs)
+        assert outputs == expected, name
+
+
+def test_failing_writes_are_kept():
+
+    # x + 0 -> x and a constant nothing reads, both at a negative address
+    for program in ([1001, -3, 0, -3, 99], [1101, 1, 2, -3, 99]):
+        with pytest.raises(IndexError):
+            run(optimize(program), [])
@@ -0,0 +1,33 @@
+import itertools
+import json
+
+from batch import run_batch
+from computer import Computer
+
+
+def get_program():
+
+    with open("inputs.json", "r") as file:
+        return json.load(file)["tractor"]
+
+
+def test_run_batch():
+
+    program = get_program()
+    probes = list(itertools.product(range(6), repeat=2))
+    expected = [Computer(program).run(inputs=list(probe)) for probe in probes]
+
+    assert list(run_batch(program, probes, processes=2)) == expected
+
+    unordered = dict(run_batch(program, probes, processes=2, ordered=False))
+    assert [unordered[index] for index in range(len(probes))] == expected
+
+
+def test_unsized_inputs_and_one_worker():
+
+    program = get_program()
+    probes = ((x, 3) for x in range(10))
+
+    outputs = list(run_batch(program, probes, processes=1))
+
+    assert outputs == [Computer(program).run(inputs=[x, 3]) for x in range(10)]
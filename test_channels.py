@@ -0,0 +1,43 @@
+import pytest
+
+import errors
+from channels import Channel, decode, encode, frames, split
+from computer import Computer
+
+
+def test_channel():
+
+    channel = Channel([1, 2])
+    channel.feed(range(3, 6))
+    channel += [6]
+
+    assert channel.get() == 1
+    assert len(channel) == 5
+    assert channel.drain() == [2, 3, 4, 5, 6]
+
+    with pytest.raises(errors.InputStarvedError):
+        channel.get()
+
+
+def test_codec():
+
+    assert encode("R,12", "n") == [82, 44, 49, 50, 10, 110, 10]
+    assert decode(encode("#.#")) == "#.#\n"
+    assert split(encode("done") + [1409507]) == ("done\n", [1409507])
+    assert frames(encode("#.", "", "..", "", "")) == ["#.\n", "..\n"]
+
+
+def test_computer_channels():
+
+    # echo three inputs
+    computer = Computer("3,13,4,13,3,13,4,13,3,13,4,13,99,0")
+    computer.inputs.feed([7, 8])
+    assert computer.run(inputs=[9]) == [7, 8, 9]
+    assert computer.outputs is None
+
+    # outputs are only kept once something will read them
+    computer = Computer("3,13,4,13,3,13,4,13,3,13,4,13,99,0")
+    computer.outputs = Channel()
+    computer.run(inputs=[7, 8, 9])
+
+    assert computer.outputs.drain() == [7, 8, 9]
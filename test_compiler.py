@@ -0,0 +1,33 @@
+import json
+
+from compiler import CompiledComputer
+
+
+class Recorder(CompiledComputer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outputs = []
+
+    def process_outputs(self, output):
+        self.outputs.append(output)
+
+
+def test_run():
+
+    with open("tests.json", "r") as file:
+        tests = json.load(file)
+
+    for name, [program, inputs, expected] in tests["computer"].items():
+
+        computer = Recorder(program)
+        computer.run(inputs=inputs)
+        assert computer.outputs == expected, name
+
+
+def test_self_modifying():
+
+    # the first pass rewrites the OUTPUT at address 0 into immediate mode
+    program = [4, 15, 1101, 104, 0, 0, 1001, 18, -1, 18, 1005, 18, 0, 99, 0, 7, 8, 0, 2]
+    computer = Recorder(program)
+    computer.run()
+    assert computer.outputs == [7, 15]
@@ -20,3 +20,72 @@ def test_run():
         computer = Computer(program)
         outputs = computer.run(inputs=inputs)
         assert outputs == expected, name
+
+
+def test_self_modifying():
+
+    outputs = []
+
+    class Recorder(Computer):
+        def process_outputs(self, output):
+            outputs.append(output)
+
+    # the first pass rewrites the OUTPUT at address 0 into immediate mode
+    program = [4, 15, 1101, 104, 0, 0, 1001, 18, -1, 18, 1005, 18, 0, 99, 0, 7, 8, 0, 2]
+    Recorder(program).run()
+    assert outputs == [7, 15]
+
+
+def test_resume():
+
+    # read two inputs and output their sum
+    computer = Computer([3, 11, 3, 12, 1, 11, 12, 13, 4, 13, 99, 0, 0, 0])
+
+    assert computer.run(inputs=[5], early_stopping=True) == []
+    assert computer.waiting and not computer.finished
+
+    assert computer.run(inputs=[7], early_stopping=True) == [12]
+    assert computer.finished
+    assert computer.steps == 5
+
+    # starving does not count the input that never ran
+    computer = Computer([3, 11, 99])
+    for _ in range(3):
+        computer.run(early_stopping=True)
+    assert computer.steps == 0
+
+
+def test_fork():
+
+    # read two inputs and output their sum
+    parent = Computer([3, 11, 3, 12, 1, 11, 12, 13, 4, 13, 99, 0, 0, 0])
+    parent.run(inputs=[5], early_stopping=True)
+
+    child = parent.fork()
+    assert child.run(inputs=[1], early_stopping=True) == [6]
+    assert parent.run(inputs=[7], early_stopping=True) == [12]
+    assert (child.program[12], parent.program[12]) == (1, 7)
+
+
+def test_snapshot():
+
+    computer = Computer([3, 11, 3, 12, 1, 11, 12, 13, 4, 13, 99, 0, 0, 0])
+    computer.run(inputs=[5], early_stopping=True)
+    snapshot = computer.snapshot()
+
+    assert computer.run(inputs=[7], early_stopping=True) == [12]
+    computer.restore(snapshot)
+    assert computer.run(inputs=[8], early_stopping=True) == [13]
+
+
+def test_superinstructions():
+
+    # count to 5 - the ADD is fused with the LESS-THAN that reads its result
+    computer = Computer([1001, 20, 1, 20, 1007, 20, 5, 21, 1005, 21, 0, 4, 20, 99])
+    assert computer.run() == [5]
+    assert computer.decoded[0][0].NAME == "ADD+LESS-THAN"
+    assert computer.steps == 17
+
+    # the ADD rewrites the second parameter of the LESS-THAN it is fused with
+    computer = Computer([1101, 3, 0, 6, 1007, 6, 9, 15, 4, 15, 99, 0, 0, 0, 0, 0])
+    assert computer.run() == [0]
@@ -0,0 +1,33 @@
+import random
+
+import conformance
+from codes import OpCodes
+
+
+def test_engines_agree():
+
+    differences, skipped = conformance.run(seed=0, count=200)
+
+    assert differences == []
+    assert skipped < 50
+
+
+def test_random_programs_cover_every_opcode_and_mode():
+
+    rng = random.Random(0)
+    opcodes = OpCodes()
+    codes, modes_seen = set(), set()
+
+    for _ in range(50):
+        words = conformance.random_program(rng)
+        address = 0
+        while True:
+            opcode, modes = opcodes.parse(words[address])
+            codes.add(opcode.CODE)
+            if opcode.CODE == 99:
+                break
+            modes_seen.update(modes[: opcode.PARAMETERS])
+            address += opcode.PARAMETERS + 1
+
+    assert codes == set(OpCodes.LOOKUP)
+    assert modes_seen == {0, 1, 2}
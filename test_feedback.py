@@ -1,6 +1,9 @@
 import itertools
 import json
 
+import pytest
+
+import errors
 from computer import Computer
 from feedback import FeedbackLoop
 
@@ -27,3 +30,41 @@ def test_loop():
         largest = max(output, largest)
 
     assert 4931744 == largest
+
+
+def test_tight_channels():
+
+    program = get_program()
+    order = (9, 8, 7, 6, 5)
+
+    def loop(capacity):
+        return FeedbackLoop(5, Computer, program, order, capacity=capacity).run([0])
+
+    assert loop(capacity=2) == loop(capacity=None)
+
+
+def test_fan_out_and_in():
+
+    # reads a phase setting, then doubles every input it is given
+    doubler = "3,20,3,21,1002,21,2,21,4,21,1105,1,2"
+    edges = {0: [1, 2], 1: [3], 2: [3]}
+
+    loop = FeedbackLoop(4, Computer, doubler, [0] * 4, edges=edges)
+
+    assert loop.run([1, 2]) == 16
+    assert loop.scheduler.metrics()[3]["instructions"] == 1 + 4 * 4
+
+    # a second run starts again from fresh machines
+    assert loop.run([3]) == 24
+
+
+def test_deadlock_is_reported():
+
+    # reads two inputs and writes two outputs per pass, so every machine in the
+    # ring gets further behind than a small channel can hold
+    program = [3, 20, 3, 21, 4, 21, 4, 21, 1001, 22, -1, 22, 1005, 22, 2, 99] + [0] * 6 + [3]
+
+    assert FeedbackLoop(2, Computer, program, [0, 0], capacity=None).run([1]) is not None
+
+    with pytest.raises(errors.DeadlockError):
+        FeedbackLoop(2, Computer, program, [0, 0], capacity=2).run([1])
@@ -0,0 +1,55 @@
+import math
+
+import numpy
+
+import fft
+import fft_signal
+
+
+def test_phases():
+
+    assert fft_signal.next_phase([1, 2, 3, 4, 5, 6, 7, 8]) == [4, 8, 2, 2, 6, 1, 5, 8]
+    assert fft.pt1("12345678", phases=4) == "01029498"
+    assert fft.pt1("80871224585914546619083218645595") == "24176176"
+    assert fft.pt1("19617804207202209144916044189917") == "73745418"
+    assert fft.pt1("69317163492948606335995924319873") == "52432133"
+
+
+def test_phase_matches_pattern_matrix():
+
+    rng = numpy.random.default_rng(0)
+
+    for n in [1, 2, 5, 31, 200]:
+        signal = rng.integers(0, 10, n)
+        pattern = numpy.array(
+            [[[0, 1, 0, -1][(j + 1) // (i + 1) % 4] for j in range(n)] for i in range(n)]
+        )
+        assert (fft.phase(signal) == numpy.abs(pattern @ signal) % 10).all()
+
+
+def test_message():
+
+    assert fft.pt2("03036732577212944063491565474664") == "84462026"
+    assert fft.pt2("02935109699940807407585447034323") == "78725270"
+    assert fft.pt2("03081770884921959731165446850517") == "53553731"
+
+
+def test_tail_phase_across_chunks():
+
+    digits = numpy.random.default_rng(0).integers(0, 10, 1000).astype(numpy.uint8)
+    expected = numpy.cumsum(digits[::-1])[::-1] % 10
+
+    fft.tail_phase(digits, numpy.empty(64, dtype=numpy.uint32))
+
+    assert (digits == expected).all()
+
+
+def test_jump():
+
+    for p in [1, 2, 7, 100, 126]:
+        expected = [math.comb(p - 1 + k, k) % 10 for k in range(700)]
+        assert fft.coefficients(p, 700).tolist() == expected
+
+    for signal in ["03036732577212944063491565474664", "03081770884921959731165446850517"]:
+        for phases in [0, 1, 100, 137]:
+            assert fft.jump(signal, phases) == fft.pt2(signal, phases)
@@ -0,0 +1,29 @@
+import json
+
+import image
+from computer import Computer
+
+
+def test_round_trip(tmp_path):
+
+    with open("inputs.json", "r") as file:
+        program = json.load(file)["sensor_boost"]
+
+    path = tmp_path / "boost.icim"
+    image.save(program, path)
+    memory = image.load(path)
+
+    assert [memory[i] for i in range(len(program) + 10)] == program + [0] * 10
+    assert Computer(memory).run(inputs=[1]) == [3742852857]
+    # the loaded image is not changed by the machines built from it
+    assert memory[0] == program[0]
+
+
+def test_cached(tmp_path):
+
+    text = "104,1125899906842624,99"
+    first = image.cached(text, directory=tmp_path)
+    second = image.cached(text, directory=tmp_path)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert Computer(first).run() == Computer(second).run() == [1125899906842624]
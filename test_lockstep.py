@@ -0,0 +1,31 @@
+import itertools
+import json
+
+from computer import Computer
+from lockstep import run_lockstep
+
+
+def test_tractor():
+
+    with open("inputs.json", "r") as file:
+        program = json.load(file)["tractor"]
+
+    inputs = [list(probe) for probe in itertools.product(range(20), repeat=2)]
+
+    assert run_lockstep(program, inputs) == [
+        Computer(program).run(inputs=list(probe)) for probe in inputs
+    ]
+
+
+def test_branches():
+
+    with open("tests.json", "r") as file:
+        cases = json.load(file)["computer"]
+
+    for name, (program, _, _) in cases.items():
+        if name.startswith("sensor_boost"):
+            continue
+        inputs = [[n] for n in range(-2, 12)]
+        assert run_lockstep(program, inputs) == [
+            Computer(program).run(inputs=list(values)) for values in inputs
+        ]
@@ -0,0 +1,39 @@
+from itertools import permutations
+
+import pytest
+
+import errors
+from amplifier import run_in_order
+from computer import Computer
+from memo import RunCache
+from network import Node
+
+PROGRAM = "3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0"
+
+
+def test_amplifiers():
+
+    cache = RunCache()
+    best = max(run_in_order(order, PROGRAM, cache)[0] for order in permutations(range(5)))
+
+    assert best == 43210
+    assert best == max(run_in_order(order, PROGRAM)[0] for order in permutations(range(5)))
+    assert cache.hits > cache.misses
+
+
+def test_disk_and_eviction(tmp_path):
+
+    cache = RunCache(size=1, directory=tmp_path)
+    assert cache.run(PROGRAM, [4, 0]) == [4]
+    assert cache.run(PROGRAM, [3, 4]) == [43]
+    assert len(cache.results) == 1
+
+    reloaded = RunCache(directory=tmp_path)
+    assert reloaded.run(Computer(PROGRAM), [4, 0]) == [4]
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+
+def test_refuses_impure_machines():
+
+    with pytest.raises(errors.ImpureMachineError):
+        RunCache().run(Node(PROGRAM), [4, 0])
@@ -0,0 +1,41 @@
+from memory import PAGE_SIZE, Memory
+
+
+def test_lazy_pages():
+
+    memory = Memory([1, 2, 3])
+    assert memory[2] == 3
+    assert memory[10 ** 9] == 0
+    assert memory.size() == PAGE_SIZE
+
+    memory[10 ** 9] = 7
+    assert memory[10 ** 9] == 7
+    assert memory.size() == 2 * PAGE_SIZE
+
+
+def test_overflow():
+
+    memory = Memory([0])
+    memory[5] = 2 ** 80
+    memory[6] = -(2 ** 80)
+    assert memory[5] == 2 ** 80
+    assert memory[6] == -(2 ** 80)
+    assert memory[0] == 0
+
+
+def test_digest():
+
+    memory = Memory(range(3000))
+    digest = memory.digest()
+    copy = memory.copy()
+
+    assert copy.digest() == digest
+    assert copy.digests == memory.digests
+
+    copy[2500] = -1
+    assert 2 not in copy.digests
+    assert copy.digest() != digest
+    assert memory.digest() == digest
+
+    copy[2500] = 2500
+    assert copy.digest() == digest
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+import errors
+from network import Network
+
+# boots, sends (255, address, 10 * address) and then reads packets forever
+PROGRAM = [3, 100, 104, 255, 4, 100, 1002, 100, 10, 101, 4, 101]
+PROGRAM += [3, 102, 1008, 102, -1, 103, 1005, 103, 12, 3, 104, 1105, 1, 12, 99]
+
+
+def test_network():
+
+    network = Network(PROGRAM, 50)
+    y = asyncio.run(network.run())
+
+    assert network.first_nat_packet == (0, 0)
+    assert y == network.nat_packet[1] == 490
+    assert network.metrics()[0]["delivered"] == 1
+
+
+def test_idle_without_nat_packet():
+
+    # boots and then only ever reads
+    network = Network([3, 100, 3, 100, 1105, 1, 2], 3)
+
+    with pytest.raises(errors.DeadlockError):
+        asyncio.run(asyncio.wait_for(network.run(), timeout=5))
+
+
+def test_machine_failure_is_raised():
+
+    # boots and then hits an unknown opcode
+    network = Network([3, 100, 98], 2)
+
+    with pytest.raises(errors.UnknownOpcodeError):
+        asyncio.run(asyncio.wait_for(network.run(), timeout=5))
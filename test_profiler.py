@@ -0,0 +1,51 @@
+from computer import Computer
+from profiler import Profiler, StackProfiler
+
+
+def test_profile():
+
+    # read two inputs and output their sum
+    computer = Computer([3, 11, 3, 12, 1, 11, 12, 13, 4, 13, 99, 0, 0, 0])
+    profiler = Profiler().attach(computer)
+    computer.run(inputs=[5, 7])
+    profiler.detach()
+
+    report = profiler.report()
+    assert report["instructions"] == 5
+    assert report["opcodes"] == {"SAVE": 2, "ADD": 1, "OUTPUT": 1, "BREAK": 1}
+    assert report["addresses"] == {"0": 1, "2": 1, "4": 1, "8": 1, "10": 1}
+    assert report["reads"] == {"11": 1, "12": 1, "13": 1}
+    assert report["writes"] == {"11": 1, "12": 1, "13": 1}
+    assert "execute" not in vars(computer)
+
+
+def test_fused_pairs_count_as_two():
+
+    # 3 < 5 is written to 11 and read back straight away by the jump, a fusable pair
+    computer = Computer([1107, 3, 5, 11, 1005, 11, 9, 104, 1, 99, 0, 0])
+    profiler = Profiler().attach(computer)
+    computer.run()
+    profiler.detach()
+
+    report = profiler.report()
+    assert any(hasattr(opcode, "second") for opcode, _, _ in computer.decoded.values())
+    assert report["instructions"] == computer.steps == 3
+    assert report["opcodes"] == {"LESS-THAN": 1, "JUMP-IF-TRUE": 1, "BREAK": 1}
+    assert report["addresses"] == {"0": 1, "4": 1, "9": 1}
+    assert report["reads"] == {"11": 1}
+
+
+def test_stacks():
+
+    # main sets up a stack at 100 and calls the function at 12, which makes a
+    # frame, does three additions and returns to 9 to output and halt
+    program = [109, 100, 21101, 9, 0, 0, 1105, 1, 12, 104, 0, 99]
+    program += [109, 5] + [1101, 1, 1, 50] * 3 + [109, -5, 2106, 0, 0]
+
+    computer = Computer(program)
+    profiler = StackProfiler(interval=1, names={12: "add"}).attach(computer)
+    computer.run()
+    profiler.detach()
+
+    assert profiler.folded() == "main 6\nmain;add 5"
+    assert "execute" not in vars(computer)
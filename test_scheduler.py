@@ -0,0 +1,62 @@
+from channels import Channel
+from compiler import CompiledComputer
+from computer import Computer
+from scheduler import Scheduler
+
+# loops forever without input or output
+RUNAWAY = "1105,1,0"
+
+# doubles every input it is given, forever
+DOUBLER = "3,9,1002,9,2,9,4,9,1105,1,0"
+
+
+def test_runaway_does_not_starve_others():
+
+    scheduler = Scheduler(budget=1000)
+    received = []
+
+    scheduler.add("runaway", Computer(RUNAWAY))
+    scheduler.add("compiled runaway", CompiledComputer(RUNAWAY))
+    scheduler.add("doubler", Computer(DOUBLER), inputs=[1, 2, 3], on_output=received.extend)
+    scheduler.run(until=lambda: len(received) == 3)
+
+    assert received == [2, 4, 6]
+
+    metrics = scheduler.metrics()
+    assert metrics["doubler"]["slices"] == 1
+    assert 1000 <= metrics["compiled runaway"]["instructions"] <= 1010
+
+
+def test_only_runnable_machines_are_scheduled():
+
+    scheduler = Scheduler()
+    received = []
+    scheduler.add("doubler", Computer(DOUBLER), on_output=received.extend)
+    scheduler.run()
+
+    assert not scheduler.runnable
+    assert scheduler.metrics()["doubler"]["slices"] == 1
+
+    scheduler.send("doubler", [21])
+    scheduler.run()
+
+    assert received == [42]
+    assert scheduler.metrics()["doubler"]["slices"] == 2
+
+
+def test_backpressure():
+
+    # outputs 1, 2, 3, ... forever
+    counter = "4,10,1001,10,1,10,1105,1,0,0,1"
+
+    doubler = Computer(DOUBLER)
+    doubler.inputs = Channel(capacity=3)
+    received = []
+
+    scheduler = Scheduler()
+    scheduler.add("counter", Computer(counter), feeds=["doubler"])
+    scheduler.add("doubler", doubler, on_output=received.extend)
+    scheduler.run(until=lambda: len(received) >= 100)
+
+    assert received[:100] == [2 * n for n in range(1, 101)]
+    assert scheduler.metrics()["counter"]["instructions"] < 3 * 110
@@ -0,0 +1,26 @@
+import json
+
+import amplifier
+from search import search
+
+CHAIN = "3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0"
+
+
+def test_chain():
+
+    assert search(CHAIN, processes=2) == (43210, (4, 3, 2, 1, 0))
+    assert search(CHAIN, phases=range(7), stages=4, processes=3) == amplifier.search(
+        CHAIN, range(7), 4
+    )[:2]
+
+
+def test_feedback_with_progress():
+
+    with open("tests.json", "r") as file:
+        program = json.load(file)["feedback"]
+
+    reports = []
+    best = search(program, "feedback", processes=2, progress=lambda *report: reports.append(report))
+
+    assert best[0] == 4931744
+    assert reports[-1][:2] == (120, 120)
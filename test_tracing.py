@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import errors
+import tracing
+from computer import Computer
+
+
+def load(name):
+    with open("inputs.json", "r") as file:
+        return json.load(file)[name]
+
+
+def test_record_and_replay(tmp_path):
+
+    program = load("tractor")
+    computer = Computer(program)
+    recorder = tracing.Recorder(pointers=True).attach(computer)
+    outputs = computer.run(inputs=[12, 9])
+    recorder.detach()
+
+    path = tmp_path / "tractor.trace"
+    recorder.save(path)
+
+    assert [kind for kind, _, _ in tracing.read(path)] == [0, 0, 1]
+    assert tracing.replay(path, program) == outputs
+
+    # a different program does not follow the trace
+    with pytest.raises(errors.ReplayError):
+        tracing.replay(path, load("sensor_boost"))
+
+
+def test_resume_from_checkpoint(tmp_path):
+
+    path = tmp_path / "boost.checkpoint"
+    computer = Computer(load("sensor_boost"))
+    computer.process_outputs = lambda output: None
+    tracing.Checkpointer(path, interval=50_000).attach(computer)
+
+    execute = computer.execute
+
+    def crash(**instructions):
+        if computer.steps > 120_000:
+            raise KeyboardInterrupt
+        return execute(**instructions)
+
+    computer.execute = crash
+    with pytest.raises(KeyboardInterrupt):
+        computer.run(inputs=[2])
+
+    resumed = Computer(load("sensor_boost"))
+    tracing.Checkpointer(path, interval=50_000).attach(resumed)
+
+    assert 100_000 <= resumed.steps <= 120_000
+    assert resumed.run() == [73439]
@@ -0,0 +1,356 @@
+import mmap
+import os
+import pickle
+import struct
+import zlib
+
+import errors
+from computer import Computer
+
+# magic, version, flags
+HEADER = struct.Struct("<4sHH")
+MAGIC = b"ICTR"
+VERSION = 1
+
+# flag set when every event records the address of its instruction
+POINTERS = 1
+
+INPUT = 0
+OUTPUT = 1
+
+# magic, generation, payload length, crc32 of the payload
+SLOT = struct.Struct("<4sQQI")
+CHECKPOINT_MAGIC = b"ICCP"
+
+
+def encode_number(value, data):
+    """
+    Append a zigzag varint to a bytearray
+    """
+    value = 2 * value if value >= 0 else -2 * value - 1
+    while value > 0x7F:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def decode_number(data, offset):
+    """
+    Read a zigzag varint, returning it and the offset after it
+    """
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise errors.TraceError("trace ends part way through an event")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    return (value >> 1) if not value & 1 else -(value >> 1) - 1, offset
+
+
+def wrap(computer, name, function):
+    """
+    Replace a method on one machine, returning whatever it replaced
+    """
+    previous = vars(computer).get(name)
+    setattr(computer, name, function)
+    return previous
+
+
+def unwrap(computer, name, previous):
+    """
+    Put back a method replaced with `wrap`
+    """
+    if previous is None:
+        delattr(computer, name)
+    else:
+        setattr(computer, name, previous)
+
+
+class Recorder:
+    """
+    Records the inputs and outputs of a Computer as a compact binary trace
+
+    Events are recorded where instructions execute, so machines that gather
+    their inputs or handle their outputs in their own way (`Arcade`, `RepairDroid`)
+    are recorded all the same.
+    """
+
+    def __init__(self, pointers=False):
+        self.pointers = pointers
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, POINTERS if pointers else 0))
+        self.computer = None
+        self.previous = None
+
+    def attach(self, computer):
+        """
+        Start recording a machine
+        """
+        execute = computer.execute
+
+        def recorded(opcode, parameters, modes, inputs):
+            address = computer.pointer - len(parameters) - 1
+            for value in inputs:
+                self.event(INPUT, value, address)
+            output = execute(opcode, parameters, modes, inputs)
+            if output is not None:
+                self.event(OUTPUT, output, address)
+            return output
+
+        self.previous = wrap(computer, "execute", recorded)
+        self.computer = computer
+        return self
+
+    def detach(self):
+        """
+        Stop recording, putting the machine back as it was
+        """
+        unwrap(self.computer, "execute", self.previous)
+        self.computer = None
+
+    def event(self, kind, value, address):
+        """
+        Append an event to the trace
+        """
+        self.data.append(kind)
+        encode_number(value, self.data)
+        if self.pointers:
+            encode_number(address, self.data)
+
+    def save(self, path):
+        """
+        Write the trace to a file
+        """
+        with open(path, "wb") as file:
+            file.write(self.data)
+
+
+def read(trace):
+    """
+    Parse a trace, given as bytes or a path, into (kind, value, address) events;
+    the address is None when pointers were not recorded
+    """
+    if isinstance(trace, (str, os.PathLike)):
+        with open(trace, "rb") as file:
+            trace = file.read()
+
+    if len(trace) < HEADER.size:
+        raise errors.TraceError("too short to be a trace")
+
+    magic, version, flags = HEADER.unpack_from(trace)
+    if magic != MAGIC or version != VERSION:
+        raise errors.TraceError("not a version %s trace" % VERSION)
+
+    events = []
+    offset = HEADER.size
+    while offset < len(trace):
+        kind = trace[offset]
+        value, offset = decode_number(trace, offset + 1)
+        address = None
+        if flags & POINTERS:
+            address, offset = decode_number(trace, offset)
+        events.append((kind, value, address))
+
+    return events
+
+
+def replay(trace, program, machine=Computer):
+    """
+    Re-run a recorded session, feeding the machine the recorded inputs and
+    checking its outputs against the recorded ones
+
+    Only the machine's instructions run - whatever decided the inputs and
+    consumed the outputs when the trace was recorded is skipped, so pass the
+    plain program (with any patches it was recorded with) rather than, say, an
+    `Arcade`. Raises ReplayError as soon as the run diverges from the trace.
+    """
+    events = read(trace)
+    computer = machine(program)
+    cursor = 0
+    execute = computer.execute
+
+    def expect(kind, value, address):
+        nonlocal cursor
+        if cursor == len(events):
+            raise errors.ReplayError("run continues past the end of the trace")
+        recorded = events[cursor]
+        if recorded[0] != kind or (value is not None and recorded[1] != value):
+            raise errors.ReplayError("event %s: expected %s, got %s" % (cursor, recorded, (kind, value)))
+        if recorded[2] is not None and recorded[2] != address:
+            raise errors.ReplayError("event %s ran at %s, not %s" % (cursor, address, recorded[2]))
+        cursor += 1
+        return recorded[1]
+
+    def replayed(opcode, parameters, modes, inputs):
+        address = computer.pointer - len(parameters) - 1
+        if opcode.INPUTS:
+            inputs = [expect(INPUT, None, address)]
+        output = execute(opcode, parameters, modes, inputs)
+        if output is not None:
+            expect(OUTPUT, output, address)
+        return output
+
+    computer.execute = replayed
+    # the real inputs are substituted by `replayed`
+    computer.get_inputs = lambda: [None]
+    computer.process_outputs = lambda *outputs: None
+
+    outputs = computer.run()
+    if cursor != len(events):
+        raise errors.ReplayError("run ended after %s of %s events" % (cursor, len(events)))
+
+    return outputs
+
+
+def capture(computer):
+    """
+    The state of a machine, without its caches or any wrapped methods
+    """
+    return {
+        name: value
+        for name, value in vars(computer).items()
+        if name not in computer.CACHES and not callable(value)
+    }
+
+
+def load_state(computer, state):
+    """
+    Put a machine into a captured state
+    """
+    computer.__dict__.update(state)
+    for name in computer.CACHES:
+        setattr(computer, name, {})
+
+
+class Checkpointer:
+    """
+    Periodically saves the full state of a Computer to a memory-mapped file
+
+    The file holds two slots that are written in turn, each with a generation
+    number and a checksum, so a crash part way through a checkpoint leaves the
+    previous one to resume from. Checkpoints are taken between instructions,
+    every `interval` instructions or so.
+    """
+
+    def __init__(self, path, interval=10_000_000):
+        self.path = os.fspath(path)
+        self.interval = interval
+        self.map = None
+        self.capacity = 0
+        self.generation = 0
+        self.computer = None
+        self.previous = None
+        self.due = 0
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 2 * SLOT.size:
+            self.map = self.open(self.path)
+            self.capacity = len(self.map) // 2 - SLOT.size
+
+    @staticmethod
+    def open(path):
+        """
+        Memory-map a checkpoint file
+        """
+        with open(path, "r+b") as file:
+            return mmap.mmap(file.fileno(), 0)
+
+    def attach(self, computer, resume=True):
+        """
+        Start checkpointing a machine, first resuming it from the latest
+        checkpoint if there is one
+        """
+        if resume:
+            state = self.latest()
+            if state is not None:
+                load_state(computer, state)
+
+        execute = computer.execute
+
+        def checkpointed(opcode, parameters, modes, inputs):
+            output = execute(opcode, parameters, modes, inputs)
+            # an output has not been handled yet, so wait for the next instruction
+            if computer.steps >= self.due and output is None:
+                self.save()
+            return output
+
+        self.previous = wrap(computer, "execute", checkpointed)
+        self.computer = computer
+        self.due = computer.steps + self.interval
+        return self
+
+    def detach(self):
+        """
+        Stop checkpointing, putting the machine back as it was
+        """
+        unwrap(self.computer, "execute", self.previous)
+        self.computer = None
+
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def latest(self):
+        """
+        The state in the newest intact checkpoint, or None
+        """
+        if self.map is None:
+            return None
+
+        newest = None
+        for offset in (0, SLOT.size + self.capacity):
+            magic, generation, length, checksum = SLOT.unpack_from(self.map, offset)
+            if magic != CHECKPOINT_MAGIC or length > self.capacity:
+                continue
+            payload = self.map[offset + SLOT.size : offset + SLOT.size + length]
+            if zlib.crc32(payload) == checksum and (newest is None or generation > newest[0]):
+                newest = (generation, payload)
+
+        if newest is None:
+            return None
+
+        self.generation = newest[0]
+        return pickle.loads(newest[1])
+
+    def save(self):
+        """
+        Checkpoint the machine now
+        """
+        payload = pickle.dumps(capture(self.computer), pickle.HIGHEST_PROTOCOL)
+        self.generation += 1
+
+        if len(payload) > self.capacity:
+            # grow through a new file, so the old checkpoint survives until
+            # the new one is complete
+            capacity = 2 * len(payload)
+            partial = "%s.%s" % (self.path, os.getpid())
+            with open(partial, "wb") as file:
+                file.truncate(2 * (SLOT.size + capacity))
+
+            self.write(self.open(partial), capacity, payload).close()
+            if self.map is not None:
+                self.map.close()
+            os.replace(partial, self.path)
+
+            self.map = self.open(self.path)
+            self.capacity = capacity
+        else:
+            self.write(self.map, self.capacity, payload)
+
+        self.due = self.computer.steps + self.interval
+
+    def write(self, mapped, capacity, payload):
+        """
+        Write a checkpoint into the slot for its generation
+        """
+        offset = (self.generation % 2) * (SLOT.size + capacity)
+        mapped[offset + SLOT.size : offset + SLOT.size + len(payload)] = payload
+        # the payload must be on disk before the header that vouches for it
+        mapped.flush()
+        SLOT.pack_into(
+            mapped, offset, CHECKPOINT_MAGIC, self.generation, len(payload), zlib.crc32(payload)
+        )
+        mapped.flush()
+        return mapped
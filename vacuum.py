@@ -1,5 +1,6 @@
 import json
 
+from channels import Channel, encode, split
 from computer import Computer
 
 DIRECTIONS = {
@@ -17,34 +18,24 @@ class Vacuum(Computer):
 
     def __init__(self, *args, **kwargs):
 
-        super().__init__(*args, **kwargs, memory=2 ** 13)
+        super().__init__(*args, **kwargs)
 
         assert self.program[0] == 1
         self.program[0] = 2
+        self.outputs = Channel()
 
         # start is at 18, 50
         self.x = 18
         self.y = 50
         self.direction = "up"
-        self.outputs = []
-
-    def get_inputs(self):
-        """
-        Get the inputs
-        """
-        return [self.inputs.pop(0)]
-
-    def process_outputs(self, output):
-        """
-        Process outputs
-        """
-        self.outputs.append(output)
 
     def post_process(self):
         """
-        Post Process
+        Post Process - show the camera output and the dust collected
         """
-        print(self.outputs)
+        text, dust = split(self.outputs.drain())
+        print(text)
+        print(dust)
 
 
 def get_directions():
@@ -114,25 +105,7 @@ functions = {
 
 def to_ascii(pattern):
 
-    output = []
-    separator = ord(",")
-    terminator = ord("\n")
-
-    for character in pattern:
-
-        if isinstance(character, int):
-            for digit in str(character):
-                output.append(ord(digit))
-
-        else:
-            output.append(ord(character))
-
-        output.append(separator)
-
-    output.pop()
-    output.append(terminator)
-
-    return output
+    return encode(",".join(map(str, pattern)))
 
 
 if __name__ == "__main__":
@@ -140,12 +113,9 @@ if __name__ == "__main__":
     with open("inputs.json", "r") as file:
         program = json.load(file)["scaffolding"]
 
-    inputs = (
-        to_ascii(main_routine)
-        + sum([to_ascii(value) for key, value in sorted(functions.items())], [])
-        + [ord("n"), ord("\n")]
-    )
-
     vacuum = Vacuum(program)
-    vacuum.inputs = inputs
+    vacuum.inputs.feed(to_ascii(main_routine))
+    for key, value in sorted(functions.items()):
+        vacuum.inputs.feed(to_ascii(value))
+    vacuum.inputs.feed(encode("n"))
     vacuum.run()